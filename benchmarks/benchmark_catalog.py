@@ -0,0 +1,316 @@
+"""
+This module has the scaling benchmarks of the catalogs of both workshops.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+Arcagames is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames. If not, see <https://www.gnu.org/licenses/>.
+
+Synthetic fleets are built through MachineFactory and VideogamesFactory, and
+every operation is timed many times to get its latency percentiles and its
+throughput. The results are written as JSON and, when a baseline is given,
+compared with it so that regressions fail the run. The stored baseline was
+recorded with the default sizes; fleets of 10**6 machines are run by adding
+1000000 to --sizes:
+
+    python benchmarks/benchmark_catalog.py --sizes 1000 10000 100000 \\
+        --output results.json --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "first_workshop"))
+sys.path.insert(0, os.path.join(ROOT, "second_workshop"))
+
+# pylint: disable=wrong-import-position
+from machines import Machine, MachineFactory  # noqa: E402
+from main_classes import Catalog as VideogameCatalog, Videogame  # noqa: E402
+from parallel import parallel_scan  # noqa: E402
+from users import Catalog, Client  # noqa: E402
+from videogames import VideogamesFactory  # noqa: E402
+
+MACHINE_TYPES = {
+    "DanceRevolution": "dance",
+    "ClassicalArcade": "classical",
+    "ShootingMachine": "shooting",
+    "RacingMachine": "racing",
+    "VirtualReality": "virtualreality",
+}
+MATERIALS = ("wood", "aluminium", "carbon_fiber")
+VIDEOGAME_NAMES = [f"Game {index}" for index in range(1000)]
+GENRES = ("Arcade", "Fighting", "Platform", "Puzzle", "Racing", "Shooter")
+
+
+def machine_specs(size: int, rng: random.Random) -> List[Tuple[str, str, str, str]]:
+    """This function returns the specs of a synthetic fleet of machines."""
+    types = list(MACHINE_TYPES)
+    return [
+        (rng.choice(types), f"Machine {index}", rng.choice(MATERIALS), "red")
+        for index in range(size)
+    ]
+
+
+def build_fleet(size: int, rng: random.Random) -> Catalog:
+    """This function builds a catalog with a synthetic fleet of machines.
+
+    Every machine is customized with define_values and about a third of them
+    get one to three extra videogames.
+    """
+    catalog = Catalog()
+    client = Client(0, "benchmark", "", "", "")
+    machines = MachineFactory.create_many(machine_specs(size, rng))
+    for machine in machines:
+        machine.define_values(
+            machine.base_price, machine.weight, machine.power_consumption, machine.material
+        )
+    catalog.add_machines(machines)
+    for machine in machines:
+        if rng.random() < 0.33:
+            specs = [
+                (
+                    machine.videogame_type,
+                    rng.choice(VIDEOGAME_NAMES),
+                    "Studio",
+                    "Visuals",
+                    "Arcade",
+                    rng.uniform(10, 100),
+                    rng.randint(1980, 2024),
+                )
+                for _ in range(rng.randint(1, 3))
+            ]
+            for videogame in VideogamesFactory.create_many(specs):
+                client.add_videogame_to_catalog(machine, videogame, rng.choice(["HD", "SH"]))
+    return catalog
+
+
+def unindexed_condition(machine: Machine) -> bool:
+    """This function is a condition that no index of the catalog covers."""
+    return machine.price > 400 and machine.color == "red" and "x" in machine.processor
+
+
+def benchmark_parallel(catalog: Catalog, workers: int) -> Dict[str, float]:
+    """This function compares the serial and the parallel scans of the catalog."""
+    start = time.perf_counter()
+    serial = parallel_scan(catalog.machines, unindexed_condition, workers=1)
+    serial_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    parallel = parallel_scan(
+        catalog.machines, unindexed_condition, workers=workers, threshold=0
+    )
+    parallel_seconds = time.perf_counter() - start
+    if parallel != serial:
+        raise ValueError("The parallel scan found other machines than the serial scan")
+    return {
+        "workers": workers,
+        "serial_seconds": serial_seconds,
+        "parallel_seconds": parallel_seconds,
+        "speedup": serial_seconds / parallel_seconds,
+    }
+
+
+def measure(operation: Callable[[], Any], repeats: int) -> Dict[str, float]:
+    """This function times an operation and returns its latency percentiles, in
+    microseconds, and its throughput, in operations per second."""
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        operation()
+        latencies.append(time.perf_counter_ns() - start)
+    latencies.sort()
+    total = sum(latencies)
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] / 1000
+
+    return {
+        "p50_us": percentile(0.50),
+        "p95_us": percentile(0.95),
+        "p99_us": percentile(0.99),
+        "ops_per_second": repeats / (total / 1e9) if total else 0.0,
+    }
+
+
+def benchmark_size(size: int, repeats: int, seed: int, workers: int) -> Dict[str, Any]:
+    """This function runs every benchmark on a fleet of the given size."""
+    rng = random.Random(seed)
+    tracemalloc.start()
+    start = time.perf_counter()
+    catalog = build_fleet(size, rng)
+    build_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results: Dict[str, Any] = {
+        "build_fleet": {
+            "seconds": build_seconds,
+            "machines_per_second": size / build_seconds,
+            "peak_memory_bytes": peak,
+        }
+    }
+    specs = machine_specs(repeats, rng)
+    spec_iter = iter(specs * 2)
+    results["create_machine"] = measure(
+        lambda: MachineFactory.create_machine(*next(spec_iter)), repeats
+    )
+    fresh: List[Machine] = MachineFactory.create_many(specs)
+    fresh_iter = iter(fresh)
+
+    def define_values():
+        machine = next(fresh_iter)
+        machine.define_values(
+            machine.base_price, machine.weight, machine.power_consumption, machine.material
+        )
+
+    results["define_values"] = measure(define_values, repeats)
+
+    def price_range():
+        low = rng.uniform(200, 700)
+        return catalog.search_by_price_range(low, low + 50)
+
+    def weight_range():
+        low = rng.uniform(20, 450)
+        return catalog.search_by_weight_range(low, low + 25)
+
+    def power_range():
+        low = rng.uniform(40, 600)
+        return catalog.search_by_power_consumption_range(low, low + 25)
+
+    # The broad searches return a large part of the fleet, so they are timed
+    # fewer times on the big fleets.
+    broad_repeats = max(5, min(repeats, 2_000_000 // size))
+    searches = {
+        "search_by_videogame_count": (
+            lambda: catalog.search_by_videogame_count(rng.randint(2, 5)),
+            broad_repeats,
+        ),
+        "search_by_videogame_count_range": (
+            lambda: catalog.search_by_videogame_count_range(4),
+            broad_repeats,
+        ),
+        "search_by_material": (
+            lambda: catalog.search_by_material(rng.choice(MATERIALS)),
+            broad_repeats,
+        ),
+        "search_by_videogame_name": (
+            lambda: catalog.search_by_videogame_name(rng.choice(VIDEOGAME_NAMES)),
+            repeats,
+        ),
+        "search_by_price_range": (price_range, repeats),
+        "search_by_weight_range": (weight_range, repeats),
+        "search_by_power_consumption_range": (power_range, repeats),
+    }
+    for name, (operation, times) in searches.items():
+        results[name] = measure(operation, times)
+    results["parallel_scan"] = benchmark_parallel(catalog, workers)
+
+    videogames = VideogameCatalog()
+    for index in range(size):
+        videogames.add_videogame(
+            Videogame(f"Title {index}", index, rng.choice(GENRES), 1980 + index % 45)
+        )
+    results["first_workshop_search_videogame_by_name"] = measure(
+        lambda: videogames.search_videogame_by_name(f"Title {rng.randrange(size)}"),
+        repeats,
+    )
+    results["first_workshop_search_videogames_by_genre"] = measure(
+        lambda: videogames.search_videogames_by_genre(rng.choice(GENRES)),
+        broad_repeats,
+    )
+    return results
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """This function compares the p50 latencies with the baseline.
+
+    Returns:
+        List[str]: The operations slower than the baseline by more than the tolerance
+    """
+    regressions = []
+    for size, operations in results["sizes"].items():
+        for name, values in operations.items():
+            old = baseline.get("sizes", {}).get(size, {}).get(name, {})
+            if "p50_us" in values and old.get("p50_us"):
+                ratio = values["p50_us"] / old["p50_us"]
+                if ratio > 1 + tolerance:
+                    regressions.append(
+                        f"{name} at {size} machines: p50 {values['p50_us']:.1f} us "
+                        f"vs {old['p50_us']:.1f} us ({ratio:.2f}x)"
+                    )
+    return regressions
+
+
+def main():
+    """This function runs the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Arcagames catalog benchmarks")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processes of the parallel scan",
+    )
+    parser.add_argument("--output", default="", help="JSON file for the results")
+    parser.add_argument("--baseline", default="", help="JSON file to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="allowed slowdown of the p50 latency over the baseline (0.5 = 50%%)",
+    )
+    arguments = parser.parse_args()
+
+    results: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": {},
+    }
+    for size in arguments.sizes:
+        results["sizes"][str(size)] = benchmark_size(
+            size, arguments.repeats, arguments.seed, arguments.workers
+        )
+        for name, values in results["sizes"][str(size)].items():
+            summary = ", ".join(f"{key}={value:,.1f}" for key, value in values.items())
+            print(f"{size:>9} {name:<42} {summary}")
+
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if arguments.baseline:
+        with open(arguments.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
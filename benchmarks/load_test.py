@@ -0,0 +1,160 @@
+"""
+This module has a load test of the catalog service.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+Arcagames is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames. If not, see <https://www.gnu.org/licenses/>.
+
+Many clients send requests over keep-alive connections for a while, mostly
+searches with some writes, and the requests per second and the latency
+percentiles are reported:
+
+    python second_workshop/service.py --port 8080 &
+    python benchmarks/load_test.py --port 8080 --clients 50 --seconds 10
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+MATERIALS = ("wood", "aluminium", "carbon_fiber")
+MACHINE_TYPES = (
+    "DanceRevolution",
+    "ClassicalArcade",
+    "ShootingMachine",
+    "RacingMachine",
+    "VirtualReality",
+)
+
+
+def search_request(rng: random.Random) -> Tuple[str, str, Optional[dict]]:
+    """This function returns a random search of the catalog."""
+    choice = rng.randrange(3)
+    if choice == 0:
+        return "GET", f"/machines/search?by=material&args={rng.choice(MATERIALS)}", None
+    if choice == 1:
+        low = rng.randrange(100, 700)
+        return "GET", f"/machines/search?by=price_range&args={low}&args={low + 100}", None
+    return "GET", f"/machines/search?by=videogame_count&args={rng.randint(2, 5)}", None
+
+
+def write_request(rng: random.Random) -> Tuple[str, str, Optional[dict]]:
+    """This function returns a random creation of a machine."""
+    return (
+        "POST",
+        "/machines",
+        {
+            "machine_type": rng.choice(MACHINE_TYPES),
+            "name": f"Load {rng.randrange(10**6)}",
+            "material": rng.choice(MATERIALS),
+            "color": "red",
+        },
+    )
+
+
+async def request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    method: str,
+    target: str,
+    body: Optional[dict],
+) -> int:
+    """This function sends a request over an open connection and returns its status."""
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+        + payload
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(
+    host: str, port: int, deadline: float, write_ratio: float, seed: int
+) -> Dict[str, List]:
+    """This function sends requests until the deadline and returns their latencies."""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies: List[float] = []
+    errors: List[int] = []
+    try:
+        while time.perf_counter() < deadline:
+            if rng.random() < write_ratio:
+                method, target, body = write_request(rng)
+            else:
+                method, target, body = search_request(rng)
+            start = time.perf_counter()
+            status = await request(reader, writer, method, target, body)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+    return {"latencies": latencies, "errors": errors}
+
+
+async def run(arguments: argparse.Namespace):
+    """This function runs every client at the same time and shows the results."""
+    start = time.perf_counter()
+    deadline = start + arguments.seconds
+    results = await asyncio.gather(
+        *(
+            client(arguments.host, arguments.port, deadline, arguments.write_ratio, seed)
+            for seed in range(arguments.clients)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    latencies = sorted(
+        latency for result in results for latency in result["latencies"]
+    )
+    errors = sum(len(result["errors"]) for result in results)
+    if not latencies:
+        print("No requests were completed.")
+        return
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1e3
+
+    print(f"Requests:      {len(latencies)} ({errors} errors)")
+    print(f"Requests/s:    {len(latencies) / elapsed:,.1f}")
+    print(
+        f"Latency (ms):  p50 {percentile(0.50):.2f}, p95 {percentile(0.95):.2f}, "
+        f"p99 {percentile(0.99):.2f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of the catalog service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--write-ratio", type=float, default=0.05, help="fraction of writes"
+    )
+    asyncio.run(run(parser.parse_args()))
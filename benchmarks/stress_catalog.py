@@ -0,0 +1,292 @@
+"""
+This module has a stress test of the catalog shared between threads.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+Arcagames is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames. If not, see <https://www.gnu.org/licenses/>.
+
+Writer threads add machines, add and remove videogames through a Client and
+redefine the values of machines, while reader threads search the catalog and
+check every result against a full scan taken under the same read lock. Any
+mismatch or error fails the run. With --unsafe the lock of the catalog is
+replaced by one that does nothing, to see that the check finds torn reads:
+
+    python benchmarks/stress_catalog.py --readers 1 2 4 8 --seconds 3
+
+With --lock-free the readers search without holding the read lock, so the
+searches take the optimistic path of ReadWriteLock.read. Every search must
+still end without an error and without a machine found twice, and it is
+checked against a full scan only when the version of the lock is the same
+before the search and after the scan, since only then both saw the same
+catalog.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "second_workshop"))
+
+# pylint: disable=wrong-import-position
+from machines import Machine, MachineFactory  # noqa: E402
+from users import Catalog, Client  # noqa: E402
+from videogames import VideogamesFactory  # noqa: E402
+
+MACHINE_TYPES = (
+    "DanceRevolution",
+    "ClassicalArcade",
+    "ShootingMachine",
+    "RacingMachine",
+    "VirtualReality",
+)
+MATERIALS = ("wood", "aluminium", "carbon_fiber")
+VIDEOGAME_NAMES = [f"Game {index}" for index in range(50)]
+
+
+class NoLock:
+    """This class has the interface of the lock of the catalog, without locking."""
+
+    # The version never changes, so every lock-free search is checked.
+    _version = 0
+
+    def read_lock(self):
+        """This method does not lock."""
+        return nullcontext()
+
+    def write_lock(self):
+        """This method does not lock."""
+        return nullcontext()
+
+    def read(self, function, *args):
+        """This method runs the function without locking."""
+        return function(*args)
+
+
+def new_machine(rng: random.Random) -> Machine:
+    """This function creates a random machine."""
+    return MachineFactory.create_machine(
+        rng.choice(MACHINE_TYPES), "Stress", rng.choice(MATERIALS), "red"
+    )
+
+
+def writer(catalog: Catalog, stop: threading.Event, seed: int, counts: List[int]):
+    """This function changes the catalog until it is stopped."""
+    rng = random.Random(seed)
+    client = Client(seed, "stress", "", "", "")
+    added: List[Tuple[Machine, object]] = []
+    while not stop.is_set():
+        action = rng.random()
+        if action < 0.2:
+            catalog.add_machine(new_machine(rng))
+        elif action < 0.6:
+            machine = catalog.machines[rng.randrange(len(catalog.machines))]
+            videogame = VideogamesFactory.create_videogames(
+                machine.videogame_type,
+                rng.choice(VIDEOGAME_NAMES),
+                "Studio",
+                "Visuals",
+                "Arcade",
+                10.0,
+                2000,
+            )
+            client.add_videogame_to_catalog(machine, videogame, "HD")
+            added.append((machine, videogame))
+        elif action < 0.9 and added:
+            machine, videogame = added.pop(rng.randrange(len(added)))
+            client.remove_videogame_from_catalog(machine, videogame, "HD")
+        else:
+            machine = catalog.machines[rng.randrange(len(catalog.machines))]
+            machine.define_values(
+                rng.uniform(100, 900),
+                machine.weight,
+                machine.power_consumption,
+                machine.material,
+            )
+        counts[0] += 1
+
+
+def checks(catalog: Catalog, rng: random.Random) -> Tuple[List[Machine], Callable]:
+    """This function runs a random search and returns its results with the
+    condition every machine of the catalog is checked with."""
+    choice = rng.randrange(4)
+    if choice == 0:
+        material = rng.choice(MATERIALS)
+        return catalog.search_by_material(material), lambda m: m.material == material
+    if choice == 1:
+        count = rng.randint(2, 6)
+        return (
+            catalog.search_by_videogame_count(count),
+            lambda m: len(m.videogames) == count,
+        )
+    if choice == 2:
+        name = rng.choice(VIDEOGAME_NAMES)
+        return (
+            catalog.search_by_videogame_name(name),
+            lambda m: any(game.name == name for game in m.videogames),
+        )
+    low = rng.uniform(100, 800)
+    return (
+        catalog.search_by_price_range(low, low + 100),
+        lambda m: low <= m.base_price <= low + 100,
+    )
+
+
+def reader(
+    catalog: Catalog,
+    stop: threading.Event,
+    seed: int,
+    counts: List[int],
+    failures: List[str],
+):
+    """This function searches the catalog and checks the results until it is stopped."""
+    rng = random.Random(seed)
+    while not stop.is_set():
+        try:
+            with catalog.lock.read_lock():
+                results, condition = checks(catalog, rng)
+                expected = {id(m) for m in catalog.machines if condition(m)}
+                if {id(m) for m in results} != expected:
+                    failures.append(
+                        f"{len(results)} machines found, {len(expected)} expected"
+                    )
+        except Exception as e:  # pylint: disable=broad-except
+            failures.append(f"{type(e).__name__}: {e}")
+        counts[0] += 1
+        counts[1] += 1
+
+
+def lock_free_reader(
+    catalog: Catalog,
+    stop: threading.Event,
+    seed: int,
+    counts: List[int],
+    failures: List[str],
+):
+    """This function searches the catalog without the read lock until it is
+    stopped. The results are checked against a scan only when no change of the
+    catalog happened during the search and the scan."""
+    rng = random.Random(seed)
+    # pylint: disable=protected-access
+    while not stop.is_set():
+        try:
+            version = catalog.lock._version
+            results, condition = checks(catalog, rng)
+            found = {id(m) for m in results}
+            if len(found) != len(results):
+                failures.append(f"{len(results) - len(found)} machines found twice")
+            elif not version & 1:
+                expected = {id(m) for m in catalog.machines if condition(m)}
+                if catalog.lock._version == version:
+                    counts[1] += 1
+                    if found != expected:
+                        failures.append(
+                            f"{len(results)} machines found, {len(expected)} expected"
+                        )
+        except Exception as e:  # pylint: disable=broad-except
+            failures.append(f"{type(e).__name__}: {e}")
+        counts[0] += 1
+
+
+def run(
+    readers: int,
+    writers: int,
+    seconds: float,
+    machines: int,
+    unsafe: bool,
+    lock_free: bool = False,
+):
+    """This function runs the readers and the writers on a new catalog.
+
+    Returns:
+        Tuple[float, float, int, List[str]]: The searches per second, the
+            changes per second, the searches checked against a scan and the
+            failures
+    """
+    rng = random.Random(readers)
+    catalog = Catalog()
+    if unsafe:
+        catalog.lock = NoLock()
+    catalog.add_machines(new_machine(rng) for _ in range(machines))
+    stop = threading.Event()
+    failures: List[str] = []
+    read_counts = [[0, 0] for _ in range(readers)]
+    write_counts = [[0] for _ in range(writers)]
+    threads = [
+        threading.Thread(
+            target=lock_free_reader if lock_free else reader,
+            args=(catalog, stop, seed, read_counts[seed], failures),
+        )
+        for seed in range(readers)
+    ] + [
+        threading.Thread(target=writer, args=(catalog, stop, seed, write_counts[seed]))
+        for seed in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    reads = sum(count[0] for count in read_counts)
+    writes = sum(count[0] for count in write_counts)
+    checked = sum(count[1] for count in read_counts)
+    return reads / seconds, writes / seconds, checked, failures
+
+
+def main():
+    """This function runs the stress test from the command line."""
+    parser = argparse.ArgumentParser(description="Stress test of the shared catalog")
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--machines", type=int, default=2000)
+    parser.add_argument(
+        "--unsafe", action="store_true", help="run without the lock of the catalog"
+    )
+    parser.add_argument(
+        "--lock-free",
+        action="store_true",
+        help="search without holding the read lock",
+    )
+    arguments = parser.parse_args()
+
+    failed = False
+    for readers in arguments.readers:
+        searches, changes, checked, failures = run(
+            readers,
+            arguments.writers,
+            arguments.seconds,
+            arguments.machines,
+            arguments.unsafe,
+            arguments.lock_free,
+        )
+        print(
+            f"{readers:>3} readers: {searches:>10,.0f} searches/s, "
+            f"{changes:>10,.0f} changes/s, {checked:>8,} checked, "
+            f"{len(failures)} failures"
+        )
+        for failure in failures[:5]:
+            print(f"    {failure}")
+        failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
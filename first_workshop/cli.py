@@ -16,7 +16,155 @@ General Public License for more details.
 You should have received a copy of the GNU General Public License 
 along with PyCalculator-UD. If not, see <https://www.gnu.org/licenses/>. 
 """
-from main_classes import User, ArcadeMachine, Purchase, Videogame, Manager
+import argparse
+import json
+import os
+import sys
+from itertools import islice
+from typing import Iterable, List, TextIO
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "second_workshop")
+)
+
+# pylint: disable=wrong-import-position
+from main_classes import User, ArcadeMachine, Purchase, Videogame, Manager  # noqa: E402
+import instrumentation  # noqa: E402
+
+
+class BatchSession:
+    """This class runs a stream of commands without the menus.
+
+    Every command is a JSON object in its own line, with its name in the
+    "command" field, and every result is written as a JSON line:
+
+        {"command": "create_machine", "material": "wood", "color": "red"}
+        {"command": "add_videogame", "machine": 0, "name": "Doom", "code": 31,
+         "genre": "Shooter", "year_release": 1993}
+        {"command": "search_name", "machine": 0, "name": "Doom"}
+        {"command": "search_genre", "machine": 0, "genre": "Shooter"}
+        {"command": "purchase", "machine": 0, "name": "Ana",
+         "address": "Street 1", "phone": "555", "email": "ana@mail.com"}
+        {"command": "show_purchases", "offset": 0, "limit": 100}
+
+    The machines are referenced by the "id" returned by create_machine.
+    """
+
+    def __init__(self, manager: Manager):
+        self.manager = manager
+        self.machines: List[ArcadeMachine] = []
+        self.handlers = {
+            "create_machine": self.create_machine,
+            "add_videogame": self.add_videogame,
+            "search_name": self.search_name,
+            "search_genre": self.search_genre,
+            "purchase": self.purchase,
+            "show_purchases": self.show_purchases,
+        }
+
+    def create_machine(self, command: dict) -> dict:
+        """This function creates an arcade machine"""
+        machine = ArcadeMachine(
+            len(self.machines) + 1, command["material"], command["color"]
+        )
+        self.machines.append(machine)
+        return {"id": len(self.machines) - 1, "price": machine.price}
+
+    def _machine(self, command: dict) -> ArcadeMachine:
+        """This function returns the arcade machine referenced by a command"""
+        try:
+            index = int(command["machine"])
+            if index < 0:
+                raise IndexError(index)
+            return self.machines[index]
+        except IndexError:
+            raise ValueError(f"Unknown machine: {command['machine']}") from None
+
+    def add_videogame(self, command: dict) -> dict:
+        """This function adds a videogame to the catalog of an arcade machine"""
+        videogame = Videogame(
+            command["name"],
+            int(command["code"]),
+            command["genre"],
+            int(command["year_release"]),
+        )
+        self._machine(command).catalog.add_videogame(videogame)
+        return videogame.to_dict()
+
+    def search_name(self, command: dict) -> dict:
+        """This function searches a videogame by name"""
+        return self._machine(command).catalog.search_videogame_by_name(
+            command["name"]
+        ).to_dict()
+
+    def search_genre(self, command: dict) -> list:
+        """This function searches all the videogames of a genre"""
+        return [
+            videogame.to_dict()
+            for videogame in self._machine(command).catalog.search_videogames_by_genre(
+                command["genre"]
+            )
+        ]
+
+    def purchase(self, command: dict) -> str:
+        """This function purchases an arcade machine"""
+        user = User(
+            command["name"], command["address"], command["phone"], command["email"]
+        )
+        purchase = Purchase(user, self._machine(command))
+        self.manager.add_purchase(purchase)
+        return purchase.to_record()
+
+    def show_purchases(self, command: dict) -> list:
+        """This function returns the records of the purchases journal, or a page
+        of them from the "offset" record, of at most "limit" records"""
+        offset = int(command.get("offset", 0))
+        limit = command.get("limit")
+        if offset < 0 or (limit is not None and int(limit) < 0):
+            raise ValueError("The offset and the limit can not be negative")
+        stop = None if limit is None else offset + int(limit)
+        self.manager.flush()
+        try:
+            with open(self.manager.journal_path, "r", encoding="utf-8") as file:
+                return [record.rstrip("\n") for record in islice(file, offset, stop)]
+        except FileNotFoundError:
+            return []
+
+    def run(self, lines: Iterable[str], output: TextIO) -> int:
+        """This function runs every command of the lines and writes the results
+
+        Returns:
+            int: The number of commands that failed
+        """
+        failures = 0
+        try:
+            for number, line in enumerate(lines, start=1):
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                try:
+                    command = json.loads(line)
+                    if not isinstance(command, dict):
+                        raise ValueError("A command must be a JSON object")
+                    handler = self.handlers.get(command.get("command"))
+                    if handler is None:
+                        raise ValueError(
+                            f"Invalid command: {command.get('command')}"
+                        )
+                    response = {
+                        "line": number, "ok": True, "result": handler(command)
+                    }
+                except KeyError as e:
+                    failures += 1
+                    response = {
+                        "line": number, "ok": False, "error": f"Missing field: {e}"
+                    }
+                except (TypeError, ValueError) as e:
+                    failures += 1
+                    response = {"line": number, "ok": False, "error": str(e)}
+                output.write(json.dumps(response) + "\n")
+        finally:
+            self.manager.flush()
+        return failures
 
 
 def admin_mode(manager):
@@ -69,28 +217,29 @@ def user_mode(manager):
             choice = input("Enter your choice: ")
 
             if choice == "1":
-                if not arcade_machine.catalog:
+                if not arcade_machine.catalog.videogames:
                     print("The catalog is empty.")
                 else:
-                    for videogame in arcade_machine.catalog:
+                    for videogame in arcade_machine.catalog.videogames:
                         videogame.show_videogame()
             elif choice == "2":
                 name = input("Enter the name of the videogame: ")
                 try:
-                    videogame = next(
-                        vg for vg in arcade_machine.catalog if vg.name == name
-                    )
+                    videogame = arcade_machine.catalog.search_videogame_by_name(name)
                     videogame.show_videogame()
-                except StopIteration:
+                except ValueError:
                     print("Videogame not found.")
+                    names = arcade_machine.catalog.suggest_videogame_names(name)
+                    if names:
+                        print(f"Did you mean: {', '.join(names)}?")
             elif choice == "3":
                 genre = input("Enter the genre of the videogame: ")
                 try:
-                    videogame = next(
-                        vg for vg in arcade_machine.catalog if vg.genre == genre
-                    )
-                    videogame.show_videogame()
-                except StopIteration:
+                    for videogame in arcade_machine.catalog.search_videogames_by_genre(
+                        genre
+                    ):
+                        videogame.show_videogame()
+                except ValueError:
                     print("Videogame not found.")
             elif choice == '4':
                 name = input("Enter the name of the videogame: ")
@@ -108,7 +257,7 @@ def user_mode(manager):
                     except ValueError:
                         print("Invalid input. Please enter a numeric year.")
                 new_videogame = Videogame(name, code, genre, year_release)
-                arcade_machine.catalog.append(new_videogame)
+                arcade_machine.catalog.add_videogame(new_videogame)
                 print("Videogame added to catalog.")
             elif choice == "5":
                 name = input("Enter your name: ")
@@ -126,27 +275,64 @@ def user_mode(manager):
                 print("Invalid choice. Please try again.")
 
 
-def main_menu():
-    """This function represents the main menu of the arcade videogame system."""
-    manager = Manager()
+def main_menu(batch: str = "", metrics: str = ""):
+    """This function represents the main menu of the arcade videogame system.
 
-    while True:
-        print("\nWelcome to Arcagames!")
-        print("1. Admin Mode")
-        print("2. User Mode")
-        print("3. Exit")
-        choice = input("Enter your choice: ")
+    Args:
+        batch (str): A file of commands to run instead of the menus, or "-"
+            to read them from the standard input
+        metrics (str): A file where the latencies of the hot paths are written
+            in the Prometheus format on exit. Without it, nothing is measured.
+    """
+    if metrics:
+        instrumentation.measure_until_exit(metrics)
+    manager = Manager()
 
-        if choice == "1":
-            admin_mode(manager)
-        elif choice == "2":
-            user_mode(manager)
-        elif choice == "3":
-            print("Exiting...")
-            break
+    if batch:
+        session = BatchSession(manager)
+        if batch == "-":
+            failures = session.run(sys.stdin, sys.stdout)
         else:
-            print("Invalid choice. Please try again.")
+            with open(batch, "r", encoding="utf-8") as file:
+                failures = session.run(file, sys.stdout)
+        sys.exit(1 if failures else 0)
+
+    # The purchases still buffered are written however the menus end, even
+    # with Ctrl-C or the end of the input.
+    try:
+        while True:
+            print("\nWelcome to Arcagames!")
+            print("1. Admin Mode")
+            print("2. User Mode")
+            print("3. Exit")
+            choice = input("Enter your choice: ")
+
+            if choice == "1":
+                admin_mode(manager)
+            elif choice == "2":
+                user_mode(manager)
+            elif choice == "3":
+                print("Exiting...")
+                break
+            else:
+                print("Invalid choice. Please try again.")
+    finally:
+        manager.flush()
 
 
 if __name__ == "__main__":
-    main_menu()
+    parser = argparse.ArgumentParser(description="Arcagames")
+    parser.add_argument(
+        "--batch",
+        default="",
+        metavar="FILE",
+        help="run the JSON line commands of FILE ('-' for stdin) without menus",
+    )
+    parser.add_argument(
+        "--metrics",
+        default="",
+        metavar="FILE",
+        help="measure the hot paths and write their latencies to FILE on exit",
+    )
+    arguments = parser.parse_args()
+    main_menu(arguments.batch, arguments.metrics)
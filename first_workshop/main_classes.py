@@ -17,18 +17,38 @@ You should have received a copy of the GNU General Public License
 along with PyCalculator-UD. If not, see <https://www.gnu.org/licenses/>. 
 """
 
-from typing import List
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence
 from datetime import datetime
 
+# The TitleIndex is shared with the second workshop. The entry scripts, such
+# as cli.py, put the second_workshop folder in the path before this import.
+from indexes import TitleIndex
+
 class Videogame:
     """This class represents a videogame"""
 
+    __slots__ = ("name", "code", "genre", "year_release")
+
     def __init__(self, name: str, code: int, genre: str, year_release: int):
         self.name = name
         self.code = code
         self.genre = genre
         self.year_release = year_release
 
+    def to_dict(self) -> dict:
+        """This function returns the videogame as a dictionary
+
+        Returns:
+            dict: The fields of the videogame
+        """
+        return {
+            "name": self.name,
+            "code": self.code,
+            "genre": self.genre,
+            "year_release": self.year_release,
+        }
+
     def show_videogame(self):
         """This function shows the videogame"""
         print(
@@ -39,12 +59,14 @@ class Videogame:
 class ArcadeMachine:
     """This class represents an arcade machine"""
 
+    __slots__ = ("code", "material", "price", "color", "catalog")
+
     def __init__(self, code: int, material: str, color: str):
         self.code = code
         self.material = material
         self.price = self.define_prices(material)
         self.color = color
-        self.catalog = Catalog().videogames
+        self.catalog = Catalog()
 
     def show_machine(self):
         """This method shows the arcade machine"""
@@ -73,6 +95,8 @@ class ArcadeMachine:
 class User:
     """This class represents a user of the system"""
 
+    __slots__ = ("name", "address", "phone", "email")
+
     def __init__(self, name: str, address: str, phone: str, email: str):
         self.name = name
         self.address = address
@@ -91,14 +115,77 @@ class User:
             arcade_machine (ArcadeMachine): The arcade machine
             videogame (Videogame): The videogame to add
         """
-        arcade_machine.catalog.append(videogame)
+        arcade_machine.catalog.add_videogame(videogame)
 
 
 class Catalog:
     """This class represents a catalog of videogames"""
 
+    _default_videogames: Sequence[Videogame] = ()
+    _default_by_name: Mapping[str, Videogame] = MappingProxyType({})
+    _default_by_genre: Mapping[str, Sequence[Videogame]] = MappingProxyType({})
+    _default_titles: Optional[TitleIndex] = None
+
     def __init__(self):
-        self.videogames = self.main_videogames()
+        if not Catalog._default_videogames:
+            Catalog._build_default_catalog()
+        self.videogames: Sequence[Videogame] = Catalog._default_videogames
+        self.videogames_by_name: Mapping[str, Videogame] = Catalog._default_by_name
+        self.videogames_by_genre: Mapping[str, Sequence[Videogame]] = (
+            Catalog._default_by_genre
+        )
+        self._shared = True
+        self._titles: Optional[TitleIndex] = None
+
+    @classmethod
+    def _build_default_catalog(cls):
+        """This function builds the immutable default catalog once, so every
+        catalog can share it until it is modified"""
+        by_name: Dict[str, Videogame] = {}
+        by_genre: Dict[str, List[Videogame]] = {}
+        videogames = tuple(cls.main_videogames())
+        for videogame in videogames:
+            by_name.setdefault(videogame.name, videogame)
+            by_genre.setdefault(videogame.genre, []).append(videogame)
+        cls._default_videogames = videogames
+        cls._default_by_name = MappingProxyType(by_name)
+        cls._default_by_genre = MappingProxyType(
+            {genre: tuple(games) for genre, games in by_genre.items()}
+        )
+
+    def _copy_on_write(self):
+        """This function gives the catalog its own copy of the shared default
+        videogames and indexes before the first modification"""
+        self.videogames = list(self.videogames)
+        self.videogames_by_name = dict(self.videogames_by_name)
+        self.videogames_by_genre = {
+            genre: list(games) for genre, games in self.videogames_by_genre.items()
+        }
+        self._shared = False
+
+    def __iter__(self) -> Iterator[Videogame]:
+        """This function iterates over the videogames of the catalog, so the
+        catalog of a machine can be used like the list it replaced"""
+        return iter(self.videogames)
+
+    def __len__(self) -> int:
+        """This function returns the number of videogames of the catalog"""
+        return len(self.videogames)
+
+    def add_videogame(self, videogame: Videogame):
+        """This function adds a videogame to the catalog and keeps the name
+        and genre indexes up to date
+
+        Args:
+            videogame (Videogame): The videogame to add
+        """
+        if self._shared:
+            self._copy_on_write()
+        self.videogames.append(videogame)
+        if videogame.name not in self.videogames_by_name and self._titles is not None:
+            self._titles.add(videogame.name)
+        self.videogames_by_name.setdefault(videogame.name, videogame)
+        self.videogames_by_genre.setdefault(videogame.genre, []).append(videogame)
 
     def show_catalog(self):
         """This function shows the catalog of videogames"""
@@ -115,10 +202,53 @@ class Catalog:
         Returns:
             Videogame: The videogame searched
         """
-        for videogame in self.videogames:
-            if videogame.name == name:
-                return videogame
-        raise ValueError("Videogame not found")
+        videogame = self.videogames_by_name.get(name)
+        if videogame is None:
+            raise ValueError("Videogame not found")
+        return videogame
+
+    def _title_index(self) -> TitleIndex:
+        """This function returns the index of the titles of the catalog. It is
+        built the first time it is needed, once for the shared default catalog,
+        and kept up to date as videogames are added"""
+        if self._shared:
+            if Catalog._default_titles is None:
+                Catalog._default_titles = TitleIndex()
+                Catalog._default_titles.update(Catalog._default_by_name)
+            return Catalog._default_titles
+        if self._titles is None:
+            self._titles = TitleIndex()
+            self._titles.update(self.videogames_by_name)
+        return self._titles
+
+    def complete_videogame_name(self, prefix: str, limit: int = 10) -> List[str]:
+        """This function completes the name of a videogame
+
+        Args:
+            prefix (str): The beginning of the name, in any case
+            limit (int): The maximum number of names
+
+        Returns:
+            List[str]: The names that start with the prefix, in alphabetical order
+        """
+        return self._title_index().complete(prefix, limit)
+
+    def suggest_videogame_names(
+        self, name: str, max_distance: int = 1, limit: int = 10
+    ) -> List[str]:
+        """This function suggests names of videogames for a name with typos
+
+        Args:
+            name (str): The name searched
+            max_distance (int): The maximum number of typos, one more when no
+                name is found with that many
+            limit (int): The maximum number of names
+
+        Returns:
+            List[str]: The closest names first, followed by the names that
+                start with the name searched
+        """
+        return self._title_index().suggest(name, max_distance, limit)
 
     def search_videogame_by_genre(self, genre: str) -> Videogame:
         """This function searches a videogame by genre
@@ -127,12 +257,23 @@ class Catalog:
             genre (str): The genre of the videogame
 
         Returns:
-            Videogame: The videogame searched by the genre
+            Videogame: The first videogame searched by the genre
         """
-        for videogame in self.videogames:
-            if videogame.genre == genre:
-                return videogame
-        raise ValueError("Videogame not found")
+        return self.search_videogames_by_genre(genre)[0]
+
+    def search_videogames_by_genre(self, genre: str) -> List[Videogame]:
+        """This function searches all the videogames of a genre
+
+        Args:
+            genre (str): The genre of the videogames
+
+        Returns:
+            List[Videogame]: The videogames of the genre, in catalog order
+        """
+        videogames = self.videogames_by_genre.get(genre)
+        if not videogames:
+            raise ValueError("Videogame not found")
+        return list(videogames)
 
     @staticmethod
     def main_videogames() -> list:
@@ -178,41 +319,68 @@ class Catalog:
 class Purchase:
     """This class represents a purchase of a videogame"""
 
+    __slots__ = ("user", "arcade_machine", "date")
+
     def __init__(self, user: User, arcade_machine: ArcadeMachine):
         self.user = user
         self.arcade_machine = arcade_machine
+        self.date = datetime.now()
+
+    def to_record(self) -> str:
+        """This function formats the purchase as a line of the purchases journal
+
+        Returns:
+            str: The purchase record, stamped with the date of the purchase
+        """
+        return (
+            f"{self.date} -> User: {self.user}, Arcade machine: {self.arcade_machine.material}, {self.arcade_machine.color}"
+        )
 
     def show_purchase(self):
         """This function shows the purchase"""
         print("Success purchase")
-        print(
-            f"{datetime.now()} -> User: {self.user}, Arcade machine: {self.arcade_machine.material}, {self.arcade_machine.color}"
-        )
+        print(self.to_record())
 
 
 class Manager:
     """This class manages all purchases"""
 
-    def __init__(self):
+    def __init__(self, journal_path: str = "purchases.txt", batch_size: int = 64):
         self.purchases: List[Purchase] = []
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self._pending_records: List[str] = []
 
     def add_purchase(self, purchase: Purchase):
-        """This method adds a purchase to the list of purchases
+        """This method adds a purchase to the list of purchases and to the
+        buffer of records waiting to be appended to the journal
 
         Args:
             purchase (Purchase): The purchase to add
         """
         self.purchases.append(purchase)
+        self._pending_records.append(purchase.to_record() + "\n")
+        if len(self._pending_records) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """This method appends the buffered purchase records to the journal"""
+        if not self._pending_records:
+            return
+        with open(self.journal_path, "a", encoding="utf-8") as file:
+            file.writelines(self._pending_records)
+        self._pending_records.clear()
 
     def show_all_purchases(self):
-        """This method shows all purchases"""
-        if not self.purchases:
+        """This method shows all purchases, reading the journal line by line"""
+        self.flush()
+        empty = True
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as file:
+                for record in file:
+                    empty = False
+                    print(record, end="")
+        except FileNotFoundError:
+            pass
+        if empty:
             print("No purchases have been made.")
-        else:
-            for purchase in self.purchases:
-                purchase.show_purchase()
-        with open("purchases.txt", "w", encoding="utf-8") as file:
-            for purchase in self.purchases:
-                file.write(
-                    f"{datetime.now()} -> User: {purchase.user}, Arcade machine: {purchase.arcade_machine.material}, {purchase.arcade_machine.color}\n"
-                )
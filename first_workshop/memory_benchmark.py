@@ -0,0 +1,106 @@
+"""
+This module measures the memory used by each record of the arcade videogame system.
+
+This file is part of Arcagames.
+
+Arcagames is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with PyCalculator-UD. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import tracemalloc
+from typing import Callable
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "second_workshop")
+)
+
+# pylint: disable=wrong-import-position
+from main_classes import User, ArcadeMachine, Purchase, Videogame  # noqa: E402
+
+
+# Subclasses without __slots__ get a per-instance __dict__ again, which is
+# exactly how the records were stored before they were slotted.
+class DictVideogame(Videogame):
+    """This class represents a videogame backed by a __dict__"""
+
+
+class DictArcadeMachine(ArcadeMachine):
+    """This class represents an arcade machine backed by a __dict__"""
+
+
+class DictUser(User):
+    """This class represents a user backed by a __dict__"""
+
+
+class DictPurchase(Purchase):
+    """This class represents a purchase backed by a __dict__"""
+
+
+def bytes_per_record(factory: Callable[[int], object], count: int) -> float:
+    """This function measures the average memory allocated by a record
+
+    Args:
+        factory (Callable[[int], object]): Builds the i-th record
+        count (int): The number of records to build
+
+    Returns:
+        float: The average number of bytes allocated per record
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list holding the records is not part of the records themselves.
+    overhead = sys.getsizeof(records)
+    return (after - before - overhead) / count
+
+
+def main(count: int = 100_000):
+    """This function prints the bytes per record before and after the slots"""
+    user = User("Ada", "Street 1", "555", "ada@mail.com")
+    machine = ArcadeMachine(1, "wood", "red")
+    benchmarks = [
+        (
+            "Videogame",
+            lambda i: DictVideogame(f"Game {i}", i, "Arcade", 1980),
+            lambda i: Videogame(f"Game {i}", i, "Arcade", 1980),
+        ),
+        (
+            "ArcadeMachine",
+            lambda i: DictArcadeMachine(i, "wood", "red"),
+            lambda i: ArcadeMachine(i, "wood", "red"),
+        ),
+        (
+            "User",
+            lambda i: DictUser(f"User {i}", "Street 1", "555", "ada@mail.com"),
+            lambda i: User(f"User {i}", "Street 1", "555", "ada@mail.com"),
+        ),
+        (
+            "Purchase",
+            lambda i: DictPurchase(user, machine),
+            lambda i: Purchase(user, machine),
+        ),
+    ]
+    print(f"{'Record':<15}{'__dict__ (B)':>14}{'__slots__ (B)':>15}{'Saved':>8}")
+    for name, dict_factory, slots_factory in benchmarks:
+        dict_bytes = bytes_per_record(dict_factory, count)
+        slots_bytes = bytes_per_record(slots_factory, count)
+        saved = 1 - slots_bytes / dict_bytes
+        print(f"{name:<15}{dict_bytes:>14.1f}{slots_bytes:>15.1f}{saved:>8.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
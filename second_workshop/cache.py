@@ -0,0 +1,148 @@
+"""
+This module has a cache of the results of the searches of the catalog.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Tuple
+
+# A test of a value of a field of a machine, true when a machine with that
+# value belongs to the results of a search.
+Matcher = Callable[[Any], bool]
+
+
+class SearchCache:
+    """This class keeps the results of the most recent searches, up to a capacity.
+
+    Every result is kept with the field its search depends on and a test of the
+    values of that field. When a machine changes, only the results whose test
+    accepts the old or the new value of the field are removed, because those
+    are the only ones the change can alter.
+    """
+
+    def __init__(self, capacity: int = 128):
+        self.capacity = capacity
+        self._entries: "OrderedDict[Hashable, Tuple[str, Matcher, List[Any]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """This method returns the result of a search, or None if it is not kept."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: Hashable, field: str, matcher: Matcher, result: List[Any]):
+        """This method keeps the result of a search, evicting the least recent one
+        when the cache is full."""
+        with self._lock:
+            self._entries[key] = (field, matcher, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, field: str, values: Iterable[Any]):
+        """This method removes the results that a machine with any of the values
+        of the field belongs to."""
+        values = list(values)
+        with self._lock:
+            stale = [
+                key
+                for key, (entry_field, matcher, _) in self._entries.items()
+                if entry_field == field and any(matcher(value) for value in values)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """This method removes every result."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """This method returns the counters of the cache."""
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def cached_search(field: str, matcher: Callable[..., Matcher]) -> Callable:
+    """This function decorates a search of the catalog to keep its results in the
+    cache of the catalog, when it has one.
+
+    A catalog with a cache always holds the read lock for the lookup, the
+    search and the store, so its searches never take the lock-free path of
+    ReadWriteLock.read and wait for every change in progress. Only a catalog
+    without a cache searches without the lock.
+
+    Args:
+        field (str): The field of the machines the search depends on
+        matcher (Callable[..., Matcher]): A function of the arguments of the
+            search that returns the test of the values of the field
+    """
+
+    def decorator(search: Callable) -> Callable:
+        signature = inspect.signature(search)
+
+        @functools.wraps(search)
+        def wrapper(catalog: Any, *args: Any, **kwargs: Any) -> List[Any]:
+            cache = catalog.cache
+            if cache is None:
+                return search(catalog, *args, **kwargs)
+            if kwargs:
+                # The arguments given by name are put in order, so the key and
+                # the test are the same as for a call without names.
+                bound = signature.bind(catalog, *args, **kwargs)
+                args, kwargs = bound.args[1:], {}
+            key = (search.__name__, args)
+            # The search and the store happen under the same read lock, so no
+            # change of the catalog can slip between them.
+            with catalog.lock.read_lock():
+                result = cache.get(key)
+                if result is None:
+                    result = search(catalog, *args, **kwargs)
+                    cache.put(key, field, matcher(*args), result)
+            return list(result)
+
+        return wrapper
+
+    return decorator
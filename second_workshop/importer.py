@@ -0,0 +1,293 @@
+"""
+This module has a streaming importer to load fleets of machines into the catalog.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+
+A fleet file has one machine per row, as CSV with a header or as JSON Lines.
+Every row has the fields machine_type, name, material and color, and may have
+a videogames field with a list of extra videogames. In CSV files that field is
+a JSON array. Each extra videogame has the fields name, storytelling_creator,
+graphics_creator, category, price, year and, optionally, resolution.
+
+    machine_type,name,material,color,videogames
+    ShootingMachine,Shooter 1,wood,red,"[{""name"": ""Doom 2"", ...}]"
+
+An invalid row stops the import with a FleetImportError that has its line
+number. The rows before it are already in the catalog, so the import can go
+on from that line once it is fixed. With skip_invalid, the invalid rows are
+skipped instead and listed in the report:
+
+    python importer.py fleet.csv --database catalog.db --skip-invalid
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+from machines import Machine, MachineFactory
+from sqlite_catalog import SQLiteCatalog
+from users import Catalog
+from videogames import VideogamesFactory
+
+# The errors of a row that is not a valid machine.
+ROW_ERRORS = (KeyError, TypeError, ValueError)
+
+
+class FleetImportError(ValueError):
+    """This exception is an invalid row that stopped an import."""
+
+    def __init__(self, line: int, imported: int, error: Exception):
+        super().__init__(
+            f"Line {line}: {_describe(error)}. "
+            f"The {imported} rows before it were imported."
+        )
+        self.line = line
+        self.imported = imported
+
+
+class ImportReport:
+    """This class has the results of an import of a fleet file."""
+
+    def __init__(
+        self,
+        rows: int,
+        seconds: float,
+        skipped: Optional[List[Tuple[int, str]]] = None,
+    ):
+        self.rows = rows
+        self.seconds = seconds
+        # The line and the error of every invalid row that was skipped.
+        self.skipped: List[Tuple[int, str]] = skipped or []
+
+    @property
+    def rows_per_second(self) -> float:
+        """This property is the throughput of the import."""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        text = (
+            f"Imported {self.rows} machines in {self.seconds:.2f} s "
+            f"({self.rows_per_second:.0f} rows/s)"
+        )
+        if self.skipped:
+            text += f", skipped {len(self.skipped)} invalid rows"
+        return text
+
+
+def _describe(error: Exception) -> str:
+    """This function describes the error of a row."""
+    if isinstance(error, KeyError):
+        return f"Missing field: {error}"
+    return str(error)
+
+
+def _raw_rows(file: TextIO, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """This function reads the rows of a fleet file, not decoded yet, with the
+    number of the line where each row ends."""
+    if file_format == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == "jsonl":
+        for number, line in enumerate(file, start=1):
+            if line.strip():
+                yield number, line
+    else:
+        raise ValueError(f"Invalid fleet format: {file_format}")
+
+
+def _decode_row(raw: Union[str, Dict[str, Any]], file_format: str) -> Dict[str, Any]:
+    """This function decodes a row read by _raw_rows."""
+    if file_format == "csv":
+        videogames = raw.get("videogames")
+        raw["videogames"] = json.loads(videogames) if videogames else []
+        return raw
+    row = json.loads(raw)
+    if not isinstance(row, dict):
+        raise ValueError("A row must be a JSON object")
+    return row
+
+
+def read_rows(file: TextIO, file_format: str) -> Iterator[Dict[str, Any]]:
+    """This function reads the rows of a fleet file one at a time.
+
+    Args:
+        file (TextIO): The opened fleet file
+        file_format (str): "csv" or "jsonl"
+    """
+    for _, raw in _raw_rows(file, file_format):
+        yield _decode_row(raw, file_format)
+
+
+def _build_batch(rows: List[Dict[str, Any]]) -> List[Machine]:
+    """This function creates, customizes and fills the machines of a batch of rows."""
+    machines = MachineFactory.create_many(
+        (row["machine_type"], row["name"], row["material"], row["color"])
+        for row in rows
+    )
+    for machine, row in zip(machines, rows):
+        machine.define_values(
+            machine.base_price,
+            machine.weight,
+            machine.power_consumption,
+            machine.material,
+        )
+        for game in row.get("videogames") or []:
+            videogame = VideogamesFactory.create_videogames(
+                machine.videogame_type,
+                game["name"],
+                game["storytelling_creator"],
+                game["graphics_creator"],
+                game["category"],
+                float(game["price"]),
+                int(game["year"]),
+            )
+            machine.add_videogame(videogame, game.get("resolution"))
+    return machines
+
+
+class _FleetImport:
+    """This class adds the batches of rows of an import to the catalog, row by
+    row when a batch has an invalid row, to find it."""
+
+    def __init__(self, catalog: Catalog, skip_invalid: bool):
+        self.catalog = catalog
+        self.skip_invalid = skip_invalid
+        self.rows = 0
+        self.skipped: List[Tuple[int, str]] = []
+
+    def reject(self, line: int, error: Exception, machines: List[Machine]):
+        """This method skips an invalid row, or adds the machines of the rows
+        before it and stops the import."""
+        if not self.skip_invalid:
+            self.catalog.add_machines(machines)
+            self.rows += len(machines)
+            raise FleetImportError(line, self.rows, error) from error
+        self.skipped.append((line, _describe(error)))
+
+    def add_batch(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        """This method creates and adds the machines of a batch of rows."""
+        try:
+            machines = _build_batch([row for _, row in batch])
+        except ROW_ERRORS:
+            machines = []
+            for line, row in batch:
+                try:
+                    machines.extend(_build_batch([row]))
+                except ROW_ERRORS as e:
+                    self.reject(line, e, machines)
+        self.catalog.add_machines(machines)
+        self.rows += len(machines)
+
+
+def import_fleet(
+    catalog: Catalog,
+    file: TextIO,
+    file_format: str,
+    batch_size: int = 1000,
+    skip_invalid: bool = False,
+) -> ImportReport:
+    """This function imports a fleet file into the catalog in batches.
+
+    Only one batch of rows is held in memory at a time, so the memory used by
+    the import does not grow with the size of the file.
+
+    Args:
+        catalog (Catalog): The catalog that receives the machines
+        file (TextIO): The opened fleet file
+        file_format (str): "csv" or "jsonl"
+        batch_size (int): The number of rows created and added together
+        skip_invalid (bool): Whether the invalid rows are skipped and reported
+            instead of stopping the import
+
+    Returns:
+        ImportReport: The number of rows imported, the throughput and the
+            rows skipped
+
+    Raises:
+        FleetImportError: When a row is invalid and skip_invalid is false. The
+            rows before it are already in the catalog.
+    """
+    start = time.perf_counter()
+    fleet_import = _FleetImport(catalog, skip_invalid)
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    for line, raw in _raw_rows(file, file_format):
+        try:
+            batch.append((line, _decode_row(raw, file_format)))
+        except ROW_ERRORS as e:
+            fleet_import.add_batch(batch)
+            batch.clear()
+            fleet_import.reject(line, e, [])
+            continue
+        if len(batch) >= batch_size:
+            fleet_import.add_batch(batch)
+            batch.clear()
+    if batch:
+        fleet_import.add_batch(batch)
+    return ImportReport(
+        fleet_import.rows, time.perf_counter() - start, fleet_import.skipped
+    )
+
+
+def import_fleet_file(
+    catalog: Catalog,
+    path: str,
+    file_format: Optional[str] = None,
+    batch_size: int = 1000,
+    skip_invalid: bool = False,
+) -> ImportReport:
+    """This function imports a fleet file by path, guessing the format from
+    the extension when it is not given."""
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        return import_fleet(catalog, file, file_format, batch_size, skip_invalid)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a fleet of machines")
+    parser.add_argument("fleet", help="fleet file, .csv or .jsonl")
+    parser.add_argument(
+        "--database",
+        default="",
+        help="SQLite file of the catalog that keeps the machines",
+    )
+    parser.add_argument(
+        "--skip-invalid",
+        action="store_true",
+        help="skip the invalid rows instead of stopping at the first one",
+    )
+    arguments = parser.parse_args()
+    fleet_catalog = (
+        SQLiteCatalog(arguments.database) if arguments.database else Catalog()
+    )
+    try:
+        report = import_fleet_file(
+            fleet_catalog, arguments.fleet, skip_invalid=arguments.skip_invalid
+        )
+    except FleetImportError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if arguments.database:
+            fleet_catalog.close()
+    print(report)
+    for line, error in report.skipped:
+        print(f"Line {line}: {error}", file=sys.stderr)
@@ -0,0 +1,350 @@
+"""
+This module has the indexes used by the catalog to answer searches without scanning every machine.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import (
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+
+class SortedColumn:
+    """This class keeps a numeric field of the machines sorted to answer range searches.
+
+    The values are stored in an array of floats sorted in ascending order, and a
+    parallel array of integers holds the position in the catalog of the machine
+    that owns each value.
+    """
+
+    def __init__(self):
+        self.values = array("d")
+        self.positions = array("q")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def insert(self, value: float, position: int):
+        """This method inserts the value of the machine at the given position."""
+        index = bisect_right(self.values, value)
+        self.values.insert(index, value)
+        self.positions.insert(index, position)
+
+    def remove(self, value: float, position: int):
+        """This method removes the value of the machine at the given position."""
+        index = bisect_left(self.values, value)
+        while self.positions[index] != position:
+            index += 1
+        del self.values[index]
+        del self.positions[index]
+
+    def overlaps(self, min_value: float, max_value: float) -> bool:
+        """This method checks in O(1), with the smallest and the largest value,
+        if the closed range can have any value of the column."""
+        values = self.values
+        return bool(values) and values[0] <= max_value and values[-1] >= min_value
+
+    def count_range(self, min_value: float, max_value: float) -> int:
+        """This method counts the machines whose value is in the closed range."""
+        return max(
+            0,
+            bisect_right(self.values, max_value) - bisect_left(self.values, min_value),
+        )
+
+    def iter_range(
+        self, min_value: float, max_value: float, offset: int = 0
+    ) -> Iterator[int]:
+        """This method yields the positions of the machines whose value is in the
+        closed range, ordered by value, skipping the first offset in O(1)."""
+        start = bisect_left(self.values, min_value) + offset
+        end = bisect_right(self.values, max_value)
+        positions = self.positions
+        for index in range(start, end):
+            yield positions[index]
+
+    def slice_range(
+        self,
+        min_value: float,
+        max_value: float,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Sequence[int]:
+        """This method returns a copy of a page of the positions of the machines
+        whose value is in the closed range, ordered by value."""
+        start = bisect_left(self.values, min_value) + offset
+        end = bisect_right(self.values, max_value)
+        if limit is not None:
+            end = min(end, start + limit)
+        return self.positions[start:end]
+
+
+class InvertedIndex:
+    """This class maps a key, such as a videogame name, to the machines that have it.
+
+    Each key keeps the positions in the catalog of its machines together with the
+    number of times the machine has the key, so a machine with the same videogame
+    twice stays indexed until both copies are removed. The keys whose positions
+    were not added in ascending order are remembered, so only their lookups in
+    order need to sort them.
+    """
+
+    def __init__(self):
+        self.postings: Dict[Hashable, Dict[int, int]] = {}
+        self._unordered: Set[Hashable] = set()
+
+    def add(self, key: Hashable, position: int):
+        """This method indexes the machine at the given position under the key."""
+        postings = self.postings.setdefault(key, {})
+        if position in postings:
+            postings[position] += 1
+            return
+        if postings and position < next(reversed(postings)):
+            self._unordered.add(key)
+        postings[position] = 1
+
+    def remove(self, key: Hashable, position: int):
+        """This method removes one occurrence of the key from the machine."""
+        postings = self.postings[key]
+        if postings[position] == 1:
+            del postings[position]
+            if not postings:
+                del self.postings[key]
+                self._unordered.discard(key)
+        else:
+            postings[position] -= 1
+
+    def lookup(self, key: Hashable) -> Iterable[int]:
+        """This method returns the positions of the machines indexed under the key."""
+        return self.postings.get(key, {}).keys()
+
+    def lookup_in_order(self, key: Hashable) -> Iterable[int]:
+        """This method returns the positions of the machines indexed under the
+        key in ascending order, which is the order of the catalog."""
+        if key in self._unordered:
+            return sorted(self.postings.get(key, ()))
+        return self.postings.get(key, {}).keys()
+
+    def count(self, key: Hashable) -> int:
+        """This method counts the machines indexed under the key."""
+        return len(self.postings.get(key, ()))
+
+
+class BucketIndex:
+    """This class groups the machines in buckets by an integer key, such as the
+    number of videogames they have.
+
+    Every bucket is a dict used as an ordered set of positions, so moving a
+    machine from one bucket to another costs O(1). The buckets whose positions
+    were not added in ascending order are remembered, so only their lookups in
+    order need to sort them.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, Dict[int, None]] = {}
+        self._unordered: Set[int] = set()
+
+    def add(self, key: int, position: int):
+        """This method puts the machine at the given position in the bucket of the key."""
+        bucket = self.buckets.setdefault(key, {})
+        if bucket and position < next(reversed(bucket)):
+            self._unordered.add(key)
+        bucket[position] = None
+
+    def remove(self, key: int, position: int):
+        """This method takes the machine at the given position out of the bucket of the key."""
+        bucket = self.buckets[key]
+        del bucket[position]
+        if not bucket:
+            del self.buckets[key]
+            self._unordered.discard(key)
+
+    def move(self, old_key: int, new_key: int, position: int):
+        """This method moves the machine at the given position to another bucket."""
+        self.remove(old_key, position)
+        self.add(new_key, position)
+
+    def lookup(self, key: int) -> Iterable[int]:
+        """This method returns the positions of the machines in the bucket of the key."""
+        return self.buckets.get(key, {}).keys()
+
+    def lookup_in_order(self, key: int) -> Iterable[int]:
+        """This method returns the positions of the machines in the bucket of the
+        key in ascending order, which is the order of the catalog."""
+        if key in self._unordered:
+            return sorted(self.buckets.get(key, ()))
+        return self.buckets.get(key, {}).keys()
+
+    def _keys_in_range(self, min_key: int, max_key: Optional[int]) -> List[int]:
+        """This method returns the keys of the buckets in the closed range, sorted."""
+        return sorted(
+            key
+            for key in self.buckets
+            if key >= min_key and (max_key is None or key <= max_key)
+        )
+
+    def count_range(self, min_key: int, max_key: Optional[int] = None) -> int:
+        """This method counts the machines whose key is in the closed range."""
+        return sum(
+            len(self.buckets[key]) for key in self._keys_in_range(min_key, max_key)
+        )
+
+    def iter_range(self, min_key: int, max_key: Optional[int] = None) -> Iterator[int]:
+        """This method yields the positions of the machines whose key is in the
+        closed range, bucket by bucket in ascending order of key. Without a
+        maximum, every key from the minimum up is included."""
+        for key in self._keys_in_range(min_key, max_key):
+            yield from self.buckets[key]
+
+
+def _after_prefix(prefix: str) -> str:
+    """This function returns the first string after every string with the prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class TitleIndex:
+    """This class finds titles, such as videogame names, by prefix or by similarity.
+
+    The titles are kept as a sorted array of case-folded keys. That array is a
+    trie without nodes: the keys under a prefix are a contiguous range found by
+    bisection, and the children of a prefix are the ranges of its next
+    characters. Each key keeps the original titles with the number of times
+    they were added, so a title stays until all its copies are removed.
+    """
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.titles: Dict[str, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, title: str):
+        """This method adds a copy of a title."""
+        key = title.casefold()
+        originals = self.titles.get(key)
+        if originals is None:
+            insort(self.keys, key)
+            originals = self.titles[key] = {}
+        originals[title] = originals.get(title, 0) + 1
+
+    def update(self, titles: Iterable[str]):
+        """This method adds a copy of every title, sorting the keys once, which
+        is faster than adding a large number of titles one by one."""
+        for title in titles:
+            originals = self.titles.setdefault(title.casefold(), {})
+            originals[title] = originals.get(title, 0) + 1
+        self.keys = sorted(self.titles)
+
+    def remove(self, title: str):
+        """This method removes a copy of a title."""
+        key = title.casefold()
+        originals = self.titles[key]
+        if originals[title] == 1:
+            del originals[title]
+            if not originals:
+                del self.titles[key]
+                del self.keys[bisect_left(self.keys, key)]
+        else:
+            originals[title] -= 1
+
+    def _originals(self, keys: Iterable[str], limit: int) -> List[str]:
+        """This method returns up to limit original titles of the keys, in order."""
+        results: List[str] = []
+        for key in keys:
+            results.extend(sorted(self.titles[key]))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """This method returns the first titles, in alphabetical order, that start
+        with the prefix, ignoring case."""
+        prefix = prefix.casefold()
+        start = bisect_left(self.keys, prefix)
+        end = len(self.keys)
+        if prefix:
+            end = bisect_left(self.keys, _after_prefix(prefix), start)
+        return self._originals(self.keys[start : min(end, start + limit)], limit)
+
+    def similar(self, title: str, max_distance: int = 1, limit: int = 10) -> List[str]:
+        """This method returns the titles at most max_distance edits away from the
+        title, ignoring case, the closest first.
+
+        The trie is walked depth first with a row of the Levenshtein table for
+        every prefix, and a prefix is left as soon as no cell of its row is
+        within the distance, since no title under it can be. Only the cells at
+        most max_distance away from the diagonal of a row can be within the
+        distance, so the rest are not computed.
+        """
+        word = title.casefold()
+        size = len(word)
+        keys = self.keys
+        beyond = max_distance + 1
+        found: List[Tuple[int, str]] = []
+        first_row = [min(index, beyond) for index in range(size + 1)]
+        stack = [("", 0, len(keys), first_row)]
+        while stack:
+            prefix, start, end, row = stack.pop()
+            depth = len(prefix) + 1
+            low = max(1, depth - max_distance)
+            high = min(size, depth + max_distance)
+            if start < end and keys[start] == prefix:
+                if row[-1] <= max_distance:
+                    found.append((row[-1], prefix))
+                start += 1
+            while start < end:
+                character = keys[start][depth - 1]
+                child = prefix + character
+                child_end = bisect_left(keys, _after_prefix(child), start, end)
+                child_row = [beyond] * (size + 1)
+                if depth <= max_distance:
+                    child_row[0] = depth
+                for index in range(low, high + 1):
+                    child_row[index] = min(
+                        child_row[index - 1] + 1,
+                        row[index] + 1,
+                        row[index - 1] + (word[index - 1] != character),
+                        beyond,
+                    )
+                if min(child_row[low - 1 : high + 1]) <= max_distance:
+                    stack.append((child, start, child_end, child_row))
+                start = child_end
+        found.sort()
+        return self._originals((key for _, key in found), limit)
+
+    def suggest(self, title: str, max_distance: int = 1, limit: int = 10) -> List[str]:
+        """This method returns the titles a mistyped title may stand for: those at
+        most max_distance edits away, or one edit more when there are none,
+        followed by the titles that start with it. Each edit more costs about
+        twenty times as long on a large index, so the wider search only runs
+        when it is needed."""
+        names = self.similar(title, max_distance, limit)
+        if not names:
+            names = self.similar(title, max_distance + 1, limit)
+        names += self.complete(title, limit)
+        return list(dict.fromkeys(names))[:limit]
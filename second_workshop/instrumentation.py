@@ -0,0 +1,266 @@
+"""
+This module has opt-in instrumentation of the hot paths of the platform.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+
+The instrumented methods are only replaced by timed wrappers while the
+instrumentation is enabled, so a disabled instrumentation costs nothing:
+
+    instrumentation.enable()
+    ...
+    print(instrumentation.METRICS.summary())
+    instrumentation.METRICS.write_prometheus("arcagames.prom")
+    instrumentation.disable()
+
+The Manager of the first workshop is instrumented too when its module,
+main_classes, can be imported. The hot paths that can not be imported are
+returned by enable(). The entry scripts with a --metrics option use
+measure_until_exit(), which reports them and writes the metrics on exit.
+"""
+
+import atexit
+import functools
+import importlib
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Tuple
+
+# The upper limits, in seconds, of the buckets of the latency histograms.
+LATENCY_BUCKETS = (
+    0.000_01,
+    0.000_05,
+    0.000_1,
+    0.000_5,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+)
+
+# The methods instrumented by enable(), by module and class.
+HOT_PATHS: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    ("users", "Catalog"): (
+        "add_machine",
+        "search_by_videogame_count",
+        "search_by_videogame_count_range",
+        "search_by_material",
+        "search_by_videogame_name",
+        "search_by_price_range",
+        "search_by_weight_range",
+        "search_by_power_consumption_range",
+    ),
+    ("sqlite_catalog", "SQLiteCatalog"): (
+        "add_machine",
+        "search_by_videogame_count",
+        "search_by_videogame_count_range",
+        "search_by_material",
+        "search_by_videogame_name",
+        "search_by_price_range",
+        "search_by_weight_range",
+        "search_by_power_consumption_range",
+    ),
+    ("users", "Client"): ("add_videogame_to_catalog", "remove_videogame_from_catalog"),
+    ("machines", "MachineFactory"): ("create_machine", "create_many"),
+    ("videogames", "VideogamesFactory"): ("create_videogames", "create_many"),
+    ("main_classes", "Manager"): ("add_purchase",),
+}
+
+
+class OperationStats:
+    """This class keeps the number of calls, the total time and the latency
+    histogram of an operation. The operations may run in several threads, so
+    the stats are changed and read under a lock."""
+
+    __slots__ = ("count", "total", "buckets", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """This method adds the latency of a call."""
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.buckets[bucket] += 1
+
+    def snapshot(self) -> Tuple[int, float, List[int]]:
+        """This method returns the count, the total and a copy of the buckets,
+        all taken at the same time."""
+        with self._lock:
+            return self.count, self.total, list(self.buckets)
+
+
+class Metrics:
+    """This class keeps the stats of every instrumented operation."""
+
+    def __init__(self):
+        self.operations: Dict[str, OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def stats(self, operation: str) -> OperationStats:
+        """This method returns the stats of an operation, creating them if needed."""
+        with self._lock:
+            stats = self.operations.get(operation)
+            if stats is None:
+                stats = self.operations[operation] = OperationStats()
+            return stats
+
+    def _snapshots(self) -> List[Tuple[str, Tuple[int, float, List[int]]]]:
+        """This method returns a snapshot of the stats of every operation, sorted
+        by operation."""
+        with self._lock:
+            operations = sorted(self.operations.items())
+        return [(operation, stats.snapshot()) for operation, stats in operations]
+
+    def reset(self):
+        """This method forgets every recorded call."""
+        with self._lock:
+            self.operations.clear()
+
+    def summary(self) -> str:
+        """This method returns a table with the calls and latencies of every operation."""
+        lines = [f"{'Operation':<50} {'Calls':>9} {'Total (ms)':>12} {'Mean (us)':>11}"]
+        for operation, (count, total, _) in self._snapshots():
+            mean = total / count * 1e6 if count else 0.0
+            lines.append(
+                f"{operation:<50} {count:>9} {total * 1e3:>12.3f} {mean:>11.1f}"
+            )
+        return "\n".join(lines)
+
+    def to_prometheus(self) -> str:
+        """This method returns the stats in the Prometheus text exposition format."""
+        name = "arcagames_operation_duration_seconds"
+        lines = [
+            f"# HELP {name} Latency of the instrumented operations.",
+            f"# TYPE {name} histogram",
+        ]
+        for operation, (count, total, buckets) in self._snapshots():
+            label = f'operation="{operation}"'
+            cumulative = 0
+            for limit, calls in zip(LATENCY_BUCKETS, buckets):
+                cumulative += calls
+                lines.append(f'{name}_bucket{{{label},le="{limit:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{label}}} {total:.9f}")
+            lines.append(f"{name}_count{{{label}}} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """This method writes the stats to a Prometheus exposition file."""
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(self.to_prometheus())
+
+
+METRICS = Metrics()
+
+# The original attributes replaced by enable(), to be restored by disable().
+_originals: List[Tuple[Any, str, Any]] = []
+
+
+def _timed(function: Callable, stats: OperationStats) -> Callable:
+    """This function wraps a function to record the latency of every call."""
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stats.record(time.perf_counter() - start)
+
+    return wrapper
+
+
+def instrument(owner: Any, name: str, operation: str = ""):
+    """This function replaces a method of a class by a timed wrapper.
+
+    Args:
+        owner (Any): The class of the method
+        name (str): The name of the method
+        operation (str): The name of the operation in the metrics, the class
+            and method names by default
+    """
+    original = owner.__dict__[name]
+    stats = METRICS.stats(operation or f"{owner.__name__}.{name}")
+    if isinstance(original, staticmethod):
+        wrapped: Any = staticmethod(_timed(original.__func__, stats))
+    elif isinstance(original, classmethod):
+        wrapped = classmethod(_timed(original.__func__, stats))
+    else:
+        wrapped = _timed(original, stats)
+    _originals.append((owner, name, original))
+    setattr(owner, name, wrapped)
+
+
+def enable() -> List[str]:
+    """This function instruments every hot path whose module can be imported.
+
+    Returns:
+        List[str]: The hot paths skipped, with the reason their module could
+            not be imported
+    """
+    skipped: List[str] = []
+    if _originals:
+        return skipped
+    for (module_name, class_name), names in HOT_PATHS.items():
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            skipped.append(f"{module_name}.{class_name} ({e})")
+            continue
+        owner = getattr(module, class_name)
+        for name in names:
+            instrument(owner, name)
+    return skipped
+
+
+def disable():
+    """This function restores the original methods. The recorded stats are kept."""
+    while _originals:
+        owner, name, original = _originals.pop()
+        setattr(owner, name, original)
+
+
+def write_report(path: str):
+    """This function writes the metrics to a Prometheus file and shows their
+    summary in the standard error."""
+    METRICS.write_prometheus(path)
+    print(METRICS.summary(), file=sys.stderr)
+
+
+def measure_until_exit(path: str):
+    """This function enables the instrumentation and writes the report to a
+    Prometheus file when the program exits. The skipped hot paths are shown in
+    the standard error."""
+    for hot_path in enable():
+        print(f"Not measured: {hot_path}", file=sys.stderr)
+    atexit.register(write_report, path)
+
+
+def is_enabled() -> bool:
+    """This function checks if the instrumentation is enabled."""
+    return bool(_originals)
@@ -0,0 +1,143 @@
+"""
+This module has the readers-writer lock that protects the catalog between threads.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import threading
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _Holder:
+    """This class holds a side of the lock inside a with block. It is built once
+    per lock, since a generator based context manager costs more than the
+    lock itself on the searches of a single key."""
+
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire: Callable[[], None], release: Callable[[], None]):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+
+    def __exit__(self, *exc_info: Any):
+        self._release()
+
+
+class ReadWriteLock:
+    """This class lets many threads read at the same time, or a single thread write.
+
+    Waiting writers go before new readers, so a stream of searches can not
+    delay a write forever. Both sides are reentrant: a thread that holds the
+    lock, to read or to write, can take it again to read, and the writer can
+    take it again to write.
+
+    Short reads can skip the lock with read(). A version, odd while a thread
+    writes, is checked before and after the read, and the read is run again
+    under the lock when a write was in progress or came in meanwhile.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._waiting_writers = 0
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._version = 0
+        self._local = threading.local()
+        self._reading = _Holder(self.acquire_read, self.release_read)
+        self._writing = _Holder(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        """This method waits until no writer is waiting or writing."""
+        depth = getattr(self._local, "reads", 0)
+        if depth or self._writer == threading.get_ident():
+            self._local.reads = depth + 1
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        self._local.reads = 1
+
+    def release_read(self):
+        """This method lets the writers in when the last reader leaves."""
+        self._local.reads -= 1
+        if self._local.reads or self._writer == threading.get_ident():
+            return
+        with self._condition:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self):
+        """This method waits until no other thread is reading or writing."""
+        ident = threading.get_ident()
+        if self._writer == ident:
+            self._write_depth += 1
+            return
+        if getattr(self._local, "reads", 0):
+            raise RuntimeError("A reader can not take the lock to write")
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writer = ident
+            self._write_depth = 1
+            self._version += 1
+
+    def release_write(self):
+        """This method lets in the next writer, or the readers."""
+        self._write_depth -= 1
+        if self._write_depth:
+            return
+        with self._condition:
+            self._version += 1
+            self._writer = None
+            self._condition.notify_all()
+
+    def read(self, function: Callable[..., T], *args: Any) -> T:
+        """This method returns the result of a function that only reads, without
+        the lock when no thread writes meanwhile. The function may run twice, so
+        it must not change anything, and it may fail on a torn read, which is
+        then run again under the lock."""
+        version = self._version
+        if not version & 1:
+            try:
+                result = function(*args)
+            except Exception:  # pylint: disable=broad-except
+                if self._version == version:
+                    raise
+            else:
+                if self._version == version:
+                    return result
+        with self._reading:
+            return function(*args)
+
+    def read_lock(self) -> _Holder:
+        """This method holds the lock to read inside a with block."""
+        return self._reading
+
+    def write_lock(self) -> _Holder:
+        """This method holds the lock to write inside a with block."""
+        return self._writing
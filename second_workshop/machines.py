@@ -20,13 +20,51 @@ along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
 """
 
 from abc import ABC
-from typing import List
+from contextlib import ExitStack, nullcontext
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
 from videogames import VideogamesFactory, Videogames
 
 
+class MachineObserver(ABC):
+    """This class defines an observer that is notified when a machine changes."""
+
+    def changing(self, machine: "Machine") -> ContextManager:
+        """This method returns the context every change of the machine runs in,
+        with its notifications, so an observer can hold a lock around them."""
+        return nullcontext()
+
+    def machine_field_changed(
+        self, machine: "Machine", field: str, old_value: Any, new_value: Any
+    ):
+        """This method is called after a field of the machine changes."""
+
+    def videogame_added(self, machine: "Machine", videogame: Videogames):
+        """This method is called after a videogame is added to the machine."""
+
+    def videogame_removed(self, machine: "Machine", videogame: Videogames):
+        """This method is called after a videogame is removed from the machine."""
+
+
 class Machine(ABC):
     """This class defines a general arcade videogames machine."""
 
+    # Type of videogames created for the machine by the VideogamesFactory.
+    videogame_type = ""
+
+    # Extra charge of each resolution over the price of the videogame. "SH" is
+    # the standard resolution as it is offered by the menus of main.py.
+    RESOLUTION_SURCHARGES = {"HD": 0.1, "SD": 0.0, "SH": 0.0}
+
     def __init__(
         self,
         name: str,
@@ -38,7 +76,7 @@ class Machine(ABC):
         memory: str,
         processor: str,
         base_price: float,
-        videogames: List[Videogames],
+        videogames: Sequence[Videogames],
     ):
         self.name = name
         self.material = material
@@ -49,26 +87,195 @@ class Machine(ABC):
         self.memory = memory
         self.processor = processor
         self.base_price = base_price
-        self.videogames = videogames
+        # Every machine has its own list, which can be changed freely, while
+        # the Videogames of a bundle stay shared with the other machines.
+        self.videogames: List[Videogames] = list(videogames)
+        self._observers: List[MachineObserver] = []
+        # Running totals, in cents, of the added videogames by resolution.
+        self.videogames_price_by_resolution: Dict[str, int] = dict.fromkeys(
+            self.RESOLUTION_SURCHARGES, 0
+        )
+        # The videogames charged in the price, with the resolution and the cents
+        # each was charged with, so a removal subtracts exactly that charge.
+        self._charges: List[Tuple[Videogames, str, int]] = []
+        # The text of the machine, kept until a field or the videogames change.
+        self._rendered: Optional[str] = None
+
+    @staticmethod
+    def create_default_videogames() -> List[Videogames]:
+        """This method creates the videogames bundled with the machine."""
+        return []
+
+    @property
+    def price(self) -> float:
+        """This property is the base price plus the added videogames, in O(1)."""
+        videogames_cents = sum(
+            cents * (1 + self.RESOLUTION_SURCHARGES[resolution])
+            for resolution, cents in self.videogames_price_by_resolution.items()
+        )
+        return self.base_price + videogames_cents / 100
+
+    def attach(self, observer: MachineObserver):
+        """This method registers an observer of the changes of the machine."""
+        self._observers.append(observer)
+
+    def detach(self, observer: MachineObserver):
+        """This method unregisters an observer of the changes of the machine."""
+        self._observers.remove(observer)
+
+    def _changing(self) -> ContextManager:
+        """This method enters the change contexts of every observer. They are
+        entered in a fixed order, so two machines never take them crossed."""
+        if not self._observers:
+            return nullcontext()
+        if len(self._observers) == 1:
+            return self._observers[0].changing(self)
+        stack = ExitStack()
+        for observer in sorted(self._observers, key=id):
+            stack.enter_context(observer.changing(self))
+        return stack
+
+    def _set_field(self, field: str, value: Any):
+        """This method changes a field of the machine and notifies the observers."""
+        old_value = getattr(self, field)
+        setattr(self, field, value)
+        self._rendered = None
+        if old_value != value:
+            for observer in self._observers:
+                observer.machine_field_changed(self, field, old_value, value)
+
+    def _check_resolution(self, videogame_resolution: Optional[str]):
+        """This method checks that a resolution, when given, is known."""
+        if (
+            videogame_resolution is not None
+            and videogame_resolution not in self.RESOLUTION_SURCHARGES
+        ):
+            raise ValueError(f"Invalid resolution: {videogame_resolution}")
+
+    def _charge_videogame(self, videogame: Videogames, videogame_resolution: str):
+        """This method adds the price of a videogame to the total of its
+        resolution and records the charge."""
+        cents = round(videogame.price * 100)
+        self.videogames_price_by_resolution[videogame_resolution] += cents
+        self._charges.append((videogame, videogame_resolution, cents))
+
+    def _refund_videogame(self, videogame: Videogames):
+        """This method subtracts the last charge of a videogame from the total it
+        was added to. A videogame that was never charged subtracts nothing."""
+        for index in range(len(self._charges) - 1, -1, -1):
+            if self._charges[index][0] is videogame:
+                _, resolution, cents = self._charges.pop(index)
+                self.videogames_price_by_resolution[resolution] -= cents
+                return
+
+    def charge_of(self, videogame: Videogames) -> Optional[Tuple[str, int]]:
+        """This method returns the resolution and the cents of the last charge of
+        a videogame, or None if it was not charged."""
+        for charged, resolution, cents in reversed(self._charges):
+            if charged is videogame:
+                return resolution, cents
+        return None
+
+    def videogame_charges(self) -> List[Optional[Tuple[str, int]]]:
+        """This method returns the charge of every videogame of the machine, in
+        the order of the videogames, to store them with the videogames."""
+        pending: Dict[int, List[Tuple[str, int]]] = {}
+        for videogame, resolution, cents in self._charges:
+            pending.setdefault(id(videogame), []).append((resolution, cents))
+        return [
+            pending[id(game)].pop(0) if pending.get(id(game)) else None
+            for game in self.videogames
+        ]
+
+    def restore_charges(self, charges: Iterable[Optional[Tuple[str, int]]]):
+        """This method restores the charges of the videogames of a machine that
+        was stored, given in the order of the videogames. The totals by
+        resolution are restored with the other attributes of the machine."""
+        self._charges = [
+            (game, charge[0], charge[1])
+            for game, charge in zip(self.videogames, charges)
+            if charge is not None
+        ]
+
+    def add_videogame(
+        self, videogame: Videogames, videogame_resolution: Optional[str] = None
+    ):
+        """This method adds a videogame to the machine and notifies the observers.
+        When a resolution is given, the videogame is charged in the price."""
+        self._check_resolution(videogame_resolution)
+        with self._changing():
+            if videogame_resolution is not None:
+                self._charge_videogame(videogame, videogame_resolution)
+            self.videogames.append(videogame)
+            self._rendered = None
+            for observer in self._observers:
+                observer.videogame_added(self, videogame)
+
+    def remove_videogame(
+        self, videogame: Videogames, videogame_resolution: Optional[str] = None
+    ):
+        """This method removes a videogame from the machine and notifies the observers.
+        The charge of the videogame, if it was charged, is discounted from the
+        price, whatever the resolution given."""
+        self._check_resolution(videogame_resolution)
+        with self._changing():
+            removed = self.videogames.pop(self.videogames.index(videogame))
+            self._rendered = None
+            self._refund_videogame(removed)
+            for observer in self._observers:
+                observer.videogame_removed(self, videogame)
 
     def define_values(
         self, base_price: float, weight: int, power_consumption: int, material: str
     ):
         """This method defines the values of the machine according to the material used."""
 
-        if material == "wood":
-            self.weight = weight * (1 + 0.1)
-            self.base_price = base_price * (1 - 0.05)
-            self.power_consumption = power_consumption * (1 + 0.15)
-        elif material == "aluminium":
-            self.weight = weight * (1 - 0.05)
-            self.base_price = base_price * (1 + 0.1)
-        elif material == "carbon_fiber":
-            self.weight = weight * (1 - 0.15)
-            self.base_price = base_price * (1 + 0.2)
-            self.power_consumption = power_consumption * (1 - 0.1)
+        with self._changing():
+            if material == "wood":
+                self._set_field("weight", weight * (1 + 0.1))
+                self._set_field("base_price", base_price * (1 - 0.05))
+                self._set_field("power_consumption", power_consumption * (1 + 0.15))
+            elif material == "aluminium":
+                self._set_field("weight", weight * (1 - 0.05))
+                self._set_field("base_price", base_price * (1 + 0.1))
+            elif material == "carbon_fiber":
+                self._set_field("weight", weight * (1 - 0.15))
+                self._set_field("base_price", base_price * (1 + 0.2))
+                self._set_field("power_consumption", power_consumption * (1 - 0.1))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """This method returns the machine as a dictionary of plain values."""
+        return {
+            "type": type(self).__name__,
+            "name": self.name,
+            "material": self.material,
+            "color": self.color,
+            "dimensions": self.dimensions,
+            "weight": self.weight,
+            "power_consumption": self.power_consumption,
+            "memory": self.memory,
+            "processor": self.processor,
+            "base_price": self.base_price,
+            "price": self.price,
+            "videogames": [game.to_dict() for game in self.videogames],
+        }
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The observers belong to the process of the machine, so a pickled
+        # machine has none.
+        state = self.__dict__.copy()
+        state["_observers"] = []
+        return state
 
     def __str__(self) -> str:
+        # The text is kept until a field is changed through _set_field, a
+        # setter of the subclass is called or a videogame is added or removed.
+        if self._rendered is None:
+            self._rendered = self._render()
+        return self._rendered
+
+    def _render(self) -> str:
+        """This method builds the text that describes the machine."""
         videogames_str = "\n".join(str(game) for game in self.videogames)
         return (
             f"\nMachine Details:\n"
@@ -89,6 +296,32 @@ class Machine(ABC):
 class DanceRevolution(Machine):
     """This class defines a Dance Revolution arcade videogames machine."""
 
+    videogame_type = "dance"
+
+    @staticmethod
+    def create_default_videogames() -> List[Videogames]:
+        """This method creates the videogames bundled with the machine."""
+        return [
+            VideogamesFactory.create_videogames(
+                "dance",
+                "Move your body",
+                "Konami",
+                "Rythm Tech",
+                "Rythm/Dance",
+                50.0,
+                2019,
+            ),
+            VideogamesFactory.create_videogames(
+                "dance",
+                "Dancing in the moon",
+                "Groove Studios",
+                "Pulse Visuals",
+                "Dance/Music",
+                60.0,
+                2022,
+            ),
+        ]
+
     def __init__(self, name: str, material: str, color: str):
         super().__init__(
             name=name,
@@ -100,34 +333,15 @@ class DanceRevolution(Machine):
             memory="32gb",
             processor="Intel Celeron",
             base_price=280.0,
-            videogames=[
-                VideogamesFactory.create_videogames(
-                    "dance",
-                    "Move your body",
-                    "Konami",
-                    "Rythm Tech",
-                    "Rythm/Dance",
-                    50.0,
-                    2019,
-                ),
-                VideogamesFactory.create_videogames(
-                    "dance",
-                    "Dancing in the moon",
-                    "Groove Studios",
-                    "Pulse Visuals",
-                    "Dance/Music",
-                    60.0,
-                    2022,
-                ),
-            ],
+            videogames=MachineFactory.default_videogames(type(self)),
         )
         self.difficulties = ["easy", "medium", "hard"]
         self.arrow_cardinalities = ["up", "down", "left", "right"]
         self.controls_price = 50
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         return (
-            super().__str__() + f"\nDifficulties: {self.difficulties}\n"
+            super()._render() + f"\nDifficulties: {self.difficulties}\n"
             f"Arrow Cardinalities: {self.arrow_cardinalities}\n"
             f"Controls Price: ${self.controls_price}"
         )
@@ -136,6 +350,32 @@ class DanceRevolution(Machine):
 class ClassicalArcade(Machine):
     """This class defines a Classical Arcade arcade videogames machine."""
 
+    videogame_type = "classical"
+
+    @staticmethod
+    def create_default_videogames() -> List[Videogames]:
+        """This method creates the videogames bundled with the machine."""
+        return [
+            VideogamesFactory.create_videogames(
+                "classical",
+                "Super Mario Bros",
+                "Atari",
+                "Pixel Masters",
+                "Action/Adventure",
+                35.0,
+                1990,
+            ),
+            VideogamesFactory.create_videogames(
+                "classical",
+                "Prince of Persa",
+                "Namco",
+                "Retro Visuals",
+                "Puzzle/Strategy",
+                40.0,
+                1988,
+            ),
+        ]
+
     def __init__(self, name: str, material: str, color: str):
         super().__init__(
             name=name,
@@ -147,49 +387,34 @@ class ClassicalArcade(Machine):
             memory="8gb",
             processor="x86",
             base_price=300.0,
-            videogames=[
-                VideogamesFactory.create_videogames(
-                    "classical",
-                    "Super Mario Bros",
-                    "Atari",
-                    "Pixel Masters",
-                    "Action/Adventure",
-                    35.0,
-                    1990,
-                ),
-                VideogamesFactory.create_videogames(
-                    "classical",
-                    "Prince of Persa",
-                    "Namco",
-                    "Retro Visuals",
-                    "Puzzle/Strategy",
-                    40.0,
-                    1988,
-                ),
-            ],
+            videogames=MachineFactory.default_videogames(type(self)),
         )
         self.make_vibration = False
         self.sound_record_alert = False
+        self._rendered = None
 
     def enable_vibration(self):
         """This method enables the vibration of the machine."""
         self.make_vibration = True
+        self._rendered = None
 
     def disable_vibration(self):
         """This method disables the vibration of the machine."""
         self.make_vibration = False
+        self._rendered = None
 
     def enable_sound_record_alert(self):
         """This method enables the sound record alert of the machine."""
         self.sound_record_alert = True
+        self._rendered = None
 
     def disable_sound_record_alert(self):
         """This method disables the sound record alert of the machine."""
         self.sound_record_alert = False
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         return (
-            super().__str__() + f"\nMake Vibration: {self.make_vibration}\n"
+            super()._render() + f"\nMake Vibration: {self.make_vibration}\n"
             f"Sound Record Alert: {self.sound_record_alert}"
         )
 
@@ -197,6 +422,32 @@ class ClassicalArcade(Machine):
 class ShootingMachine(Machine):
     """This class defines a Shooting Machine arcade videogames machine."""
 
+    videogame_type = "shooting"
+
+    @staticmethod
+    def create_default_videogames() -> List[Videogames]:
+        """This method creates the videogames bundled with the machine."""
+        return [
+            VideogamesFactory.create_videogames(
+                "shooting",
+                "Doom",
+                "Capcom",
+                "Blaster Studios",
+                "Shooter/Action",
+                55.0,
+                2007,
+            ),
+            VideogamesFactory.create_videogames(
+                "shooting",
+                "Resident Evil",
+                "SNK",
+                "Bullet Visuals",
+                "Arcade/Shooter",
+                65.0,
+                2015,
+            ),
+        ]
+
     def __init__(self, name: str, material: str, color: str):
         super().__init__(
             name=name,
@@ -208,33 +459,14 @@ class ShootingMachine(Machine):
             memory="16gb",
             processor="Intel Pentium",
             base_price=250.0,
-            videogames=[
-                VideogamesFactory.create_videogames(
-                    "shooting",
-                    "Doom",
-                    "Capcom",
-                    "Blaster Studios",
-                    "Shooter/Action",
-                    55.0,
-                    2007,
-                ),
-                VideogamesFactory.create_videogames(
-                    "shooting",
-                    "Resident Evil",
-                    "SNK",
-                    "Bullet Visuals",
-                    "Arcade/Shooter",
-                    65.0,
-                    2015,
-                ),
-            ],
+            videogames=MachineFactory.default_videogames(type(self)),
         )
         self.gun_type = "pistol"
         self.gun_price = 40
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         return (
-            super().__str__() + f"\nGun Type: {self.gun_type}\n"
+            super()._render() + f"\nGun Type: {self.gun_type}\n"
             f"Gun Price: ${self.gun_price}"
         )
 
@@ -242,6 +474,32 @@ class ShootingMachine(Machine):
 class RacingMachine(Machine):
     """This class defines a Racing Machine arcade videogames machine."""
 
+    videogame_type = "racing"
+
+    @staticmethod
+    def create_default_videogames() -> List[Videogames]:
+        """This method creates the videogames bundled with the machine."""
+        return [
+            VideogamesFactory.create_videogames(
+                "racing",
+                "Sonic Speed Game",
+                "Sega",
+                "Speed Visuals",
+                "Racing/Simulation",
+                45.0,
+                2006,
+            ),
+            VideogamesFactory.create_videogames(
+                "racing",
+                "Need for Speed",
+                "Electronic Arts",
+                "Turbo Graphics",
+                "Racing/Arcade",
+                60.0,
+                2010,
+            ),
+        ]
+
     def __init__(self, name: str, material: str, color: str):
         super().__init__(
             name=name,
@@ -253,33 +511,14 @@ class RacingMachine(Machine):
             memory="4gb",
             processor="Zilog Z80",
             base_price=350.0,
-            videogames=[
-                VideogamesFactory.create_videogames(
-                    "racing",
-                    "Sonic Speed Game",
-                    "Sega",
-                    "Speed Visuals",
-                    "Racing/Simulation",
-                    45.0,
-                    2006,
-                ),
-                VideogamesFactory.create_videogames(
-                    "racing",
-                    "Need for Speed",
-                    "Electronic Arts",
-                    "Turbo Graphics",
-                    "Racing/Arcade",
-                    60.0,
-                    2010,
-                ),
-            ],
+            videogames=MachineFactory.default_videogames(type(self)),
         )
         self.type_vehicle = "car"
         self.seats = 1
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         return (
-            super().__str__() + f"\nType Vehicle: {self.type_vehicle}\n"
+            super()._render() + f"\nType Vehicle: {self.type_vehicle}\n"
             f"Seats: {self.seats}"
         )
 
@@ -287,6 +526,32 @@ class RacingMachine(Machine):
 class VirtualReality(Machine):
     """This class defines a Virtual Reality arcade videogames machine."""
 
+    videogame_type = "virtualreality"
+
+    @staticmethod
+    def create_default_videogames() -> List[Videogames]:
+        """This method creates the videogames bundled with the machine."""
+        return [
+            VideogamesFactory.create_videogames(
+                "virtualreality",
+                "Meta Game",
+                "Meta",
+                "Meta Visuals",
+                "VR/Simulation",
+                105.0,
+                2023,
+            ),
+            VideogamesFactory.create_videogames(
+                "virtualreality",
+                "Batman VR",
+                "Electronic Arts",
+                "EA Montreal",
+                "VR/Simulation",
+                150.0,
+                2024,
+            ),
+        ]
+
     def __init__(self, name: str, material: str, color: str):
         super().__init__(
             name=name,
@@ -298,34 +563,15 @@ class VirtualReality(Machine):
             memory="64gb",
             processor="Meta Quest",
             base_price=600.0,
-            videogames=[
-                VideogamesFactory.create_videogames(
-                    "virtualreality",
-                    "Meta Game",
-                    "Meta",
-                    "Meta Visuals",
-                    "VR/Simulation",
-                    105.0,
-                    2023,
-                ),
-                VideogamesFactory.create_videogames(
-                    "virtualreality",
-                    "Batman VR",
-                    "Electronic Arts",
-                    "EA Montreal",
-                    "VR/Simulation",
-                    150.0,
-                    2024,
-                ),
-            ],
+            videogames=MachineFactory.default_videogames(type(self)),
         )
         self.type_glasses = "VR"
         self.resolution_glasses = "1080p"
         self.price_glasses = 100
 
-    def __str__(self) -> str:
+    def _render(self) -> str:
         return (
-            super().__str__() + f"\nType Glasses: {self.type_glasses}\n"
+            super()._render() + f"\nType Glasses: {self.type_glasses}\n"
             f"Resolution Glasses: {self.resolution_glasses}\n"
             f"Price Glasses: ${self.price_glasses}"
         )
@@ -334,16 +580,61 @@ class VirtualReality(Machine):
 class MachineFactory:
     """This class is a factory to create machines of different types."""
 
+    _registry: Dict[str, Type[Machine]] = {
+        "DanceRevolution": DanceRevolution,
+        "ClassicalArcade": ClassicalArcade,
+        "ShootingMachine": ShootingMachine,
+        "RacingMachine": RacingMachine,
+        "VirtualReality": VirtualReality,
+    }
+    _prototypes: Dict[Type[Machine], Tuple[Videogames, ...]] = {}
+
+    @staticmethod
+    def default_videogames(machine_class: Type[Machine]) -> Tuple[Videogames, ...]:
+        """This method returns the bundle of videogames of a type of machine.
+
+        The bundle is built once as a prototype, and its videogames are shared
+        by the lists of every machine of the type.
+        """
+        prototype = MachineFactory._prototypes.get(machine_class)
+        if prototype is None:
+            prototype = tuple(machine_class.create_default_videogames())
+            MachineFactory._prototypes[machine_class] = prototype
+        return prototype
+
+    @staticmethod
+    def register(machine_type: str, machine_class: Type[Machine]):
+        """This method registers the class used to create a type of machine."""
+        MachineFactory._registry[machine_type] = machine_class
+
+    @staticmethod
+    def machine_class(machine_type: str) -> Type[Machine]:
+        """This method returns the class registered for a type of machine."""
+        try:
+            return MachineFactory._registry[machine_type]
+        except KeyError:
+            raise ValueError(f"Invalid machine type: {machine_type}") from None
+
     @staticmethod
     def create_machine(machine_type: str, name: str, material: str, color: str):
         """This method creates a machine of the specified type."""
-        if machine_type == "DanceRevolution":
-            return DanceRevolution(name, material, color)
-        elif machine_type == "ClassicalArcade":
-            return ClassicalArcade(name, material, color)
-        elif machine_type == "ShootingMachine":
-            return ShootingMachine(name, material, color)
-        elif machine_type == "RacingMachine":
-            return RacingMachine(name, material, color)
-        elif machine_type == "VirtualReality":
-            return VirtualReality(name, material, color)
+        return MachineFactory.machine_class(machine_type)(name, material, color)
+
+    @staticmethod
+    def create_many(specs: Iterable[Tuple[str, str, str, str]]) -> List[Machine]:
+        """This method creates many machines at once.
+
+        Each spec has the arguments of create_machine: machine type, name,
+        material and color. Every spec is validated before any machine is
+        created, so an invalid spec does not leave a partial result.
+        """
+        specs = list(specs)
+        classes = []
+        for index, spec in enumerate(specs):
+            if len(spec) != 4:
+                raise ValueError(f"Invalid machine spec at {index}: {spec!r}")
+            classes.append(MachineFactory.machine_class(spec[0]))
+        return [
+            machine_class(name, material, color)
+            for machine_class, (_, name, material, color) in zip(classes, specs)
+        ]
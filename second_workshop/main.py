@@ -19,9 +19,45 @@ You should have received a copy of the GNU General Public License
 along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>. 
 """
 
+import argparse
+import json
+import sys
+from typing import Any, Callable, Dict, Iterable, List, TextIO
 from users import Catalog, Client
 from videogames import VideogamesFactory
-from machines import MachineFactory
+from machines import Machine, MachineFactory
+from results import show_pages
+from snapshot import CatalogSnapshot, write_snapshot
+from sqlite_catalog import SQLiteCatalog
+import instrumentation
+
+# Number of search results kept by the cache of the catalog kept in memory. A
+# catalog with a cache searches under the read lock, never without it.
+SEARCH_CACHE_SIZE = 128
+
+
+def menu_search(
+    catalog: Catalog, search: str, *args: Any
+) -> Callable[[int, int], List[Machine]]:
+    """This function returns the fetch of the pages of a search of the menus.
+    Every call asks the iter_by_* method of the catalog for one page, so the
+    full list of results is never built."""
+    iter_by = getattr(catalog, f"iter_by_{search}")
+
+    def fetch(offset: int, limit: int) -> List[Machine]:
+        return list(iter_by(*args, offset=offset, limit=limit))
+
+    return fetch
+
+
+def show_suggestions(catalog: Catalog, videogame_name: str):
+    """This function shows the names of the videogames of the catalog that are
+    close to a name that was not found, when the catalog can suggest them."""
+    if not hasattr(catalog, "suggest_videogame_names"):
+        return
+    names = catalog.suggest_videogame_names(videogame_name)
+    if names:
+        print(f"Did you mean: {', '.join(names)}?")
 
 
 def admin_mode(catalog: Catalog):
@@ -31,32 +67,34 @@ def admin_mode(catalog: Catalog):
         print("1. Search by videogame count")
         print("2. Search by material")
         print("3. Search by videogame name")
-        print("4. Exit to main menu")
-        choice = input("Select an option (1-4): ")
+        print("4. Write a snapshot of the catalog")
+        print("5. Exit to main menu")
+        choice = input("Select an option (1-5): ")
 
-        if choice == "4":
+        if choice == "5":
             break
 
         try:
             if choice == "1":
                 count = int(input("Enter the number of videogames: "))
-                results = catalog.search_by_videogame_count(count)
+                pages = menu_search(catalog, "videogame_count", count)
             elif choice == "2":
                 material = input("Enter the material: ")
-                results = catalog.search_by_material(material)
+                pages = menu_search(catalog, "material", material)
             elif choice == "3":
                 videogame_name = input("Enter the name of the videogame: ")
-                results = catalog.search_by_videogame_name(videogame_name)
+                pages = menu_search(catalog, "videogame_name", videogame_name)
+            elif choice == "4":
+                path = input("Enter the snapshot file: ")
+                write_snapshot(catalog.machines, path)
+                print(f"Snapshot of {len(catalog)} machines written to {path}.")
+                continue
             else:
                 print("Invalid choice. Please select a valid option.")
                 continue
 
-            if results:
-                print("\nSearch Results:")
-                for machine in results:
-                    print(machine)
-            else:
-                print("\nNo machines found matching the criteria.")
+            if not show_pages(pages) and choice == "3":
+                show_suggestions(catalog, videogame_name)
         except ValueError:
             print("Invalid input. Please enter the correct data type.")
         except Exception as e:  # pylint: disable=broad-except
@@ -212,19 +250,8 @@ def user_mode(catalog: Catalog):
                                     )
                                     continue
 
-                                if type(machine).__name__ == "DanceRevolution":
-                                    videogame_machine_type = "dance"
-                                elif type(machine).__name__ == "ClassicalArcade":
-                                    videogame_machine_type = "classical"
-                                elif type(machine).__name__ == "RacingMachine":
-                                    videogame_machine_type = "racing"
-                                elif type(machine).__name__ == "ShootingMachine":
-                                    videogame_machine_type = "shooting"
-                                elif type(machine).__name__ == "VirtualReality":
-                                    videogame_machine_type = "virtualreality"
-
                                 videogame_added = VideogamesFactory.create_videogames(
-                                    videogame_machine_type,
+                                    machine.videogame_type,
                                     videogame_name,
                                     videogame_storytelling_creator,
                                     videogame_graphics_creator,
@@ -296,37 +323,22 @@ def user_mode(catalog: Catalog):
             elif choice == "2":
                 min_price = float(input("Enter the minimum price: "))
                 max_price = float(input("Enter the maximum price: "))
-                results = catalog.search_by_price_range(min_price, max_price)
-                if results:
-                    print("\nSearch Results:")
-                    for machine in results:
-                        print(machine)
-                else:
-                    print("\nNo machines found matching the criteria.")
+                pages = menu_search(catalog, "price_range", min_price, max_price)
+                show_pages(pages)
 
             elif choice == "3":
                 min_weight = int(input("Enter the minimum weight: "))
                 max_weight = int(input("Enter the maximum weight: "))
-                results = catalog.search_by_weight_range(min_weight, max_weight)
-                if results:
-                    print("\nSearch Results:")
-                    for machine in results:
-                        print(machine)
-                else:
-                    print("\nNo machines found matching the criteria.")
+                pages = menu_search(catalog, "weight_range", min_weight, max_weight)
+                show_pages(pages)
 
             elif choice == "4":
                 min_power = int(input("Enter the minimum power consumption: "))
                 max_power = int(input("Enter the maximum power consumption: "))
-                results = catalog.search_by_power_consumption_range(
-                    min_power, max_power
+                pages = menu_search(
+                    catalog, "power_consumption_range", min_power, max_power
                 )
-                if results:
-                    print("\nSearch Results:")
-                    for machine in results:
-                        print(machine)
-                else:
-                    print("\nNo machines found matching the criteria.")
+                show_pages(pages)
 
             else:
                 print("Invalid choice. Please select a valid option.")
@@ -336,11 +348,163 @@ def user_mode(catalog: Catalog):
             print(f"An error occurred: {e}")
 
 
-def main():
-    """This function represents the main menu of the system."""
-    catalog = Catalog()
+class BatchSession:
+    """This class runs a stream of commands against the catalog without prompts.
+
+    Every command is a JSON object in its own line, with the name of the
+    command in the "command" field. Every result is written as a JSON line
+    with the number of the command line and either the result or the error.
+
+        {"command": "client", "id": 1, "name": "Ana", "email": "ana@mail.com",
+         "phone": "555", "address": "Street 1"}
+        {"command": "create_machine", "machine_type": "RacingMachine",
+         "name": "Racer", "material": "wood", "color": "red"}
+        {"command": "add_videogame", "machine": 0, "name": "Doom",
+         "storytelling_creator": "Id", "graphics_creator": "Id",
+         "category": "Shooter", "price": 20.0, "year": 1993, "resolution": "HD"}
+        {"command": "remove_videogame", "machine": 0, "name": "Doom",
+         "resolution": "HD"}
+        {"command": "search", "by": "price_range", "args": [200, 400]}
+        {"command": "write_snapshot", "path": "catalog.snap"}
+
+    The machines created in the session are referenced by the "id" returned
+    by create_machine.
+    """
+
+    SEARCHES = {
+        "videogame_count": "search_by_videogame_count",
+        "videogame_count_range": "search_by_videogame_count_range",
+        "material": "search_by_material",
+        "videogame_name": "search_by_videogame_name",
+        "price_range": "search_by_price_range",
+        "weight_range": "search_by_weight_range",
+        "power_consumption_range": "search_by_power_consumption_range",
+    }
+
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        self.client = Client(0, "batch", "", "", "")
+        self.machines: List[Machine] = []
+        self.handlers = {
+            "client": self.set_client,
+            "create_machine": self.create_machine,
+            "add_videogame": self.add_videogame,
+            "remove_videogame": self.remove_videogame,
+            "search": self.search,
+            "write_snapshot": self.write_snapshot,
+        }
+
+    def set_client(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """This method sets the client that manages the videogames."""
+        self.client = Client(
+            int(command["id"]),
+            command["name"],
+            command["email"],
+            command["phone"],
+            command["address"],
+        )
+        return {"id": self.client.id_}
+
+    def create_machine(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """This method creates a machine, customizes it and adds it to the catalog."""
+        machine = MachineFactory.create_machine(
+            command["machine_type"],
+            command["name"],
+            command["material"],
+            command["color"],
+        )
+        machine.define_values(
+            machine.base_price,
+            machine.weight,
+            machine.power_consumption,
+            machine.material,
+        )
+        self.catalog.add_machine(machine)
+        self.machines.append(machine)
+        return {"id": len(self.machines) - 1, "machine": machine.to_dict()}
 
-    # Initialize the catalog with some machines
+    def _machine(self, command: Dict[str, Any]) -> Machine:
+        """This method returns the machine of the session referenced by a command."""
+        try:
+            index = int(command["machine"])
+            if index < 0:
+                raise IndexError(index)
+            return self.machines[index]
+        except IndexError:
+            raise ValueError(f"Unknown machine: {command['machine']}") from None
+
+    def add_videogame(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """This method adds a videogame to a machine of the session."""
+        machine = self._machine(command)
+        videogame = VideogamesFactory.create_videogames(
+            machine.videogame_type,
+            command["name"],
+            command["storytelling_creator"],
+            command["graphics_creator"],
+            command["category"],
+            float(command["price"]),
+            int(command["year"]),
+        )
+        self.client.add_videogame_to_catalog(machine, videogame, command["resolution"])
+        return {"machine": machine.to_dict()}
+
+    def remove_videogame(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """This method removes a videogame by name from a machine of the session."""
+        machine = self._machine(command)
+        for videogame in machine.videogames:
+            if videogame.name == command["name"]:
+                self.client.remove_videogame_from_catalog(
+                    machine, videogame, command["resolution"]
+                )
+                return {"machine": machine.to_dict()}
+        raise ValueError(f"Videogame '{command['name']}' not found")
+
+    def search(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """This method runs one of the searches of the catalog."""
+        if command["by"] not in self.SEARCHES:
+            raise ValueError(f"Invalid search: {command['by']}")
+        search = getattr(self.catalog, self.SEARCHES[command["by"]])
+        results = search(*command.get("args", []))
+        return {
+            "count": len(results),
+            "machines": [machine.to_dict() for machine in results],
+        }
+
+    def write_snapshot(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        """This method writes a snapshot of every machine of the catalog."""
+        write_snapshot(self.catalog.machines, command["path"])
+        return {"path": command["path"], "machines": len(self.catalog)}
+
+    def run(self, lines: Iterable[str], output: TextIO) -> int:
+        """This method runs every command of the lines and writes the results.
+
+        Returns:
+            int: The number of commands that failed
+        """
+        failures = 0
+        for number, line in enumerate(lines, start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                command = json.loads(line)
+                if not isinstance(command, dict):
+                    raise ValueError("A command must be a JSON object")
+                handler = self.handlers.get(command.get("command"))
+                if handler is None:
+                    raise ValueError(f"Invalid command: {command.get('command')}")
+                response = {"line": number, "ok": True, "result": handler(command)}
+            except KeyError as e:
+                failures += 1
+                response = {"line": number, "ok": False, "error": f"Missing field: {e}"}
+            except (TypeError, ValueError) as e:
+                failures += 1
+                response = {"line": number, "ok": False, "error": str(e)}
+            output.write(json.dumps(response) + "\n")
+        return failures
+
+
+def seed_catalog(catalog: Catalog):
+    """This function initializes the catalog with some machines."""
     catalog.add_machine(
         MachineFactory.create_machine(
             "DanceRevolution", "DDR Machine", "aluminium", "red"
@@ -365,6 +529,47 @@ def main():
         MachineFactory.create_machine("VirtualReality", "VR Machine", "wood", "black")
     )
 
+
+def load_snapshot(catalog: Catalog, path: str):
+    """This function adds the machines of a snapshot file to the catalog."""
+    with CatalogSnapshot(path) as snapshot:
+        catalog.add_machines(snapshot.machines)
+
+
+def main(database: str = "", batch: str = "", metrics: str = "", snapshot: str = ""):
+    """This function represents the main menu of the system.
+
+    Args:
+        database (str): The SQLite file that keeps the catalog between runs.
+            Without it, the catalog only lives in memory.
+        batch (str): A file of commands to run instead of the menus, or "-"
+            to read them from the standard input.
+        metrics (str): A file where the latencies of the hot paths are written
+            in the Prometheus format on exit. Without it, nothing is measured.
+        snapshot (str): A snapshot file whose machines start an empty catalog,
+            instead of the default machines.
+    """
+    if metrics:
+        instrumentation.measure_until_exit(metrics)
+
+    catalog = (
+        SQLiteCatalog(database) if database else Catalog(cache_size=SEARCH_CACHE_SIZE)
+    )
+    if len(catalog) == 0:
+        if snapshot:
+            load_snapshot(catalog, snapshot)
+        else:
+            seed_catalog(catalog)
+
+    if batch:
+        session = BatchSession(catalog)
+        if batch == "-":
+            failures = session.run(sys.stdin, sys.stdout)
+        else:
+            with open(batch, "r", encoding="utf-8") as file:
+                failures = session.run(file, sys.stdout)
+        sys.exit(1 if failures else 0)
+
     while True:
         print("\nArcade Machine Catalog")
         print("1. Admin Mode")
@@ -390,4 +595,27 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Arcade machine catalog")
+    parser.add_argument(
+        "database", nargs="?", default="", help="SQLite file of the catalog"
+    )
+    parser.add_argument(
+        "--batch",
+        default="",
+        metavar="FILE",
+        help="run the JSON line commands of FILE ('-' for stdin) without menus",
+    )
+    parser.add_argument(
+        "--metrics",
+        default="",
+        metavar="FILE",
+        help="measure the hot paths and write their latencies to FILE on exit",
+    )
+    parser.add_argument(
+        "--snapshot",
+        default="",
+        metavar="FILE",
+        help="start an empty catalog with the machines of the snapshot FILE",
+    )
+    arguments = parser.parse_args()
+    main(arguments.database, arguments.batch, arguments.metrics, arguments.snapshot)
@@ -0,0 +1,135 @@
+"""
+This module has a parallel scan of the machines for conditions without an index.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+
+The machines are split in chunks that are checked in a process pool. With
+the "fork" start method the machines are given to the initializer of the
+pool, which the processes inherit instead of pickling, so only the
+condition and the bounds of every chunk are sent to them; otherwise every
+chunk of machines is pickled. The processes only send back the positions
+of the machines found, and the results keep the order of the machines.
+
+The condition must be picklable: a function defined at the top of a module,
+the predicates of the query module, or a MatchesAll of them.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+from machines import Machine
+
+# Below this number of machines the scan is done in the calling process,
+# because starting the pool costs more than checking the machines.
+PARALLEL_THRESHOLD = 50_000
+
+Condition = Callable[[Machine], bool]
+
+# The machines of the scan in a forked process of the pool. It is only set
+# in the processes, so concurrent scans of the parent never share it.
+_machines: Sequence[Machine] = ()
+
+
+class MatchesAll:
+    """This class is a picklable condition that checks several conditions."""
+
+    def __init__(self, conditions: Sequence[Condition]):
+        self.conditions = list(conditions)
+
+    def __call__(self, machine: Machine) -> bool:
+        return all(condition(machine) for condition in self.conditions)
+
+
+def _inherit(machines: Sequence[Machine]):
+    """This function keeps the machines of the scan in a forked process."""
+    global _machines  # pylint: disable=global-statement
+    _machines = machines
+
+
+def _scan_inherited(task: Tuple[Condition, int, int]) -> List[int]:
+    """This function checks a chunk of the machines inherited from the parent."""
+    condition, start, stop = task
+    return [
+        position
+        for position in range(start, stop)
+        if condition(_machines[position])
+    ]
+
+
+def _scan_chunk(task: Tuple[Condition, int, Sequence[Machine]]) -> List[int]:
+    """This function checks a chunk of machines sent to the process."""
+    condition, start, chunk = task
+    return [
+        start + offset for offset, machine in enumerate(chunk) if condition(machine)
+    ]
+
+
+def parallel_scan(
+    machines: Sequence[Machine],
+    condition: Condition,
+    workers: Optional[int] = None,
+    threshold: int = PARALLEL_THRESHOLD,
+    chunks_per_worker: int = 4,
+) -> List[Machine]:
+    """This function returns the machines that meet a condition, in order.
+
+    Args:
+        machines (Sequence[Machine]): The machines to check
+        condition (Condition): A picklable function of a machine
+        workers (Optional[int]): The number of processes, one per CPU by default
+        threshold (int): The number of machines below which the scan is serial
+        chunks_per_worker (int): The number of chunks given to every process
+
+    Returns:
+        List[Machine]: The machines that meet the condition
+    """
+    workers = workers or os.cpu_count() or 1
+    if len(machines) < threshold or workers == 1:
+        return [machine for machine in machines if condition(machine)]
+
+    size = -(-len(machines) // (workers * chunks_per_worker))
+    bounds = [
+        (start, min(start + size, len(machines)))
+        for start in range(0, len(machines), size)
+    ]
+    if multiprocessing.get_start_method() == "fork":
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_inherit,
+            initargs=(machines,),
+        ) as pool:
+            chunks = list(
+                pool.map(
+                    _scan_inherited,
+                    [(condition, start, stop) for start, stop in bounds],
+                )
+            )
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(
+                pool.map(
+                    _scan_chunk,
+                    [
+                        (condition, start, machines[start:stop])
+                        for start, stop in bounds
+                    ],
+                )
+            )
+    return [machines[position] for chunk in chunks for position in chunk]
@@ -0,0 +1,250 @@
+"""
+This module has a query engine that combines the searches of the catalog.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from machines import Machine
+
+
+class Predicate(ABC):
+    """This class defines a condition of a query that can use an index of the catalog."""
+
+    @abstractmethod
+    def estimate(self, catalog: Any) -> int:
+        """This method returns the number of machines the index finds for the condition."""
+
+    @abstractmethod
+    def positions(self, catalog: Any) -> Iterable[int]:
+        """This method returns the positions of the machines the index finds."""
+
+    @abstractmethod
+    def matches(self, machine: Machine) -> bool:
+        """This method checks the condition on a single machine."""
+
+    @abstractmethod
+    def __str__(self) -> str:
+        pass
+
+
+class MaterialPredicate(Predicate):
+    """This class is the condition of a specific type of material."""
+
+    def __init__(self, material: str):
+        self.material = material
+
+    def estimate(self, catalog: Any) -> int:
+        return catalog.materials.count(self.material)
+
+    def positions(self, catalog: Any) -> Iterable[int]:
+        return catalog.materials.lookup(self.material)
+
+    def matches(self, machine: Machine) -> bool:
+        return machine.material == self.material
+
+    def __str__(self) -> str:
+        return f"material = {self.material!r}"
+
+
+class VideogameNamePredicate(Predicate):
+    """This class is the condition of having a specific videogame by name."""
+
+    def __init__(self, videogame_name: str):
+        self.videogame_name = videogame_name
+
+    def estimate(self, catalog: Any) -> int:
+        return catalog.videogame_names.count(self.videogame_name)
+
+    def positions(self, catalog: Any) -> Iterable[int]:
+        return catalog.videogame_names.lookup(self.videogame_name)
+
+    def matches(self, machine: Machine) -> bool:
+        return any(
+            videogame.name == self.videogame_name for videogame in machine.videogames
+        )
+
+    def __str__(self) -> str:
+        return f"videogame name = {self.videogame_name!r}"
+
+
+class VideogameCountPredicate(Predicate):
+    """This class is the condition of a closed range of number of videogames.
+    Without a maximum, the range has no upper limit."""
+
+    def __init__(self, min_count: int, max_count: Optional[int] = None):
+        self.min_count = min_count
+        self.max_count = max_count
+
+    def estimate(self, catalog: Any) -> int:
+        return catalog.videogame_counts.count_range(self.min_count, self.max_count)
+
+    def positions(self, catalog: Any) -> Iterable[int]:
+        return catalog.videogame_counts.iter_range(self.min_count, self.max_count)
+
+    def matches(self, machine: Machine) -> bool:
+        count = len(machine.videogames)
+        return count >= self.min_count and (
+            self.max_count is None or count <= self.max_count
+        )
+
+    def __str__(self) -> str:
+        if self.max_count is None:
+            return f"videogame count >= {self.min_count}"
+        return f"videogame count between {self.min_count} and {self.max_count}"
+
+
+class RangePredicate(Predicate):
+    """This class is the condition of a closed range of a numeric field."""
+
+    def __init__(self, field: str, min_value: float, max_value: float):
+        self.field = field
+        self.min_value = min_value
+        self.max_value = max_value
+
+    def estimate(self, catalog: Any) -> int:
+        return catalog.columns[self.field].count_range(self.min_value, self.max_value)
+
+    def positions(self, catalog: Any) -> Iterable[int]:
+        return catalog.columns[self.field].iter_range(self.min_value, self.max_value)
+
+    def matches(self, machine: Machine) -> bool:
+        return self.min_value <= getattr(machine, self.field) <= self.max_value
+
+    def __str__(self) -> str:
+        return f"{self.field} between {self.min_value} and {self.max_value}"
+
+
+class QueryPlan:
+    """This class describes how a query is run: the predicate whose index gives
+    the candidates and the predicates checked on each candidate, in order."""
+
+    def __init__(
+        self,
+        index: Optional[Predicate],
+        filters: List[Predicate],
+        estimates: List[Tuple[Predicate, int]],
+        total: int,
+    ):
+        self.index = index
+        self.filters = filters
+        self.estimates = {id(predicate): rows for predicate, rows in estimates}
+        self.total = total
+
+    def __str__(self) -> str:
+        if self.index is None:
+            lines = [f"Full scan of {self.total} machines"]
+        else:
+            rows = self.estimates[id(self.index)]
+            lines = [f"Index scan on {self.index} ({rows} of {self.total} machines)"]
+        for predicate in self.filters:
+            rows = self.estimates[id(predicate)]
+            lines.append(f"  Filter {predicate} ({rows} machines in its index)")
+        return "\n".join(lines)
+
+
+class CatalogQuery:
+    """This class is a query that combines any of the searches of the catalog.
+
+    The planner asks the index of every predicate how many machines match it,
+    takes the candidates from the most selective index, and checks the other
+    predicates on those candidates, the most selective first.
+
+        query = CatalogQuery(
+            catalog, material="aluminium", price_range=(200, 400),
+            videogame_name="Doom",
+        )
+        print(query.explain())
+        machines = query.run()
+    """
+
+    def __init__(
+        self,
+        catalog: Any,
+        material: Optional[str] = None,
+        videogame_name: Optional[str] = None,
+        videogame_count: Optional[int] = None,
+        videogame_count_range: Optional[Tuple[int, Optional[int]]] = None,
+        price_range: Optional[Tuple[float, float]] = None,
+        weight_range: Optional[Tuple[float, float]] = None,
+        power_consumption_range: Optional[Tuple[float, float]] = None,
+    ):
+        self.catalog = catalog
+        self.predicates: List[Predicate] = []
+        if material is not None:
+            self.predicates.append(MaterialPredicate(material))
+        if videogame_name is not None:
+            self.predicates.append(VideogameNamePredicate(videogame_name))
+        if videogame_count is not None:
+            self.predicates.append(
+                VideogameCountPredicate(videogame_count, videogame_count)
+            )
+        if videogame_count_range is not None:
+            self.predicates.append(VideogameCountPredicate(*videogame_count_range))
+        for field, values in (
+            ("base_price", price_range),
+            ("weight", weight_range),
+            ("power_consumption", power_consumption_range),
+        ):
+            if values is not None:
+                self.predicates.append(RangePredicate(field, *values))
+
+    def plan(self) -> QueryPlan:
+        """This method chooses the index and the order of the filters of the query."""
+        estimates = [
+            (predicate, predicate.estimate(self.catalog))
+            for predicate in self.predicates
+        ]
+        ordered = [
+            predicate for predicate, _ in sorted(estimates, key=lambda item: item[1])
+        ]
+        index = ordered[0] if ordered else None
+        return QueryPlan(index, ordered[1:], estimates, len(self.catalog))
+
+    def explain(self) -> str:
+        """This method describes the plan chosen for the query."""
+        return str(self.plan())
+
+    def iter(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[Machine]:
+        """This method returns a page of the machines that match every predicate.
+        The page is taken at once while the catalog is locked to read."""
+        with self.catalog.lock.read_lock():
+            plan = self.plan()
+            machines = self.catalog.machines
+            if plan.index is None:
+                candidates: Iterable[Machine] = machines
+            else:
+                candidates = (
+                    machines[position]
+                    for position in plan.index.positions(self.catalog)
+                )
+            filters = plan.filters
+            results = (
+                machine
+                for machine in candidates
+                if all(predicate.matches(machine) for predicate in filters)
+            )
+            stop = None if limit is None else offset + limit
+            page = list(islice(results, offset, stop))
+        return iter(page)
+
+    def run(self) -> List[Machine]:
+        """This method returns every machine that matches every predicate."""
+        return list(self.iter())
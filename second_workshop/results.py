@@ -0,0 +1,111 @@
+"""
+This module has a writer that shows the results of the searches of the catalog.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import sys
+from typing import Callable, Iterable, List, Optional, TextIO
+from machines import Machine
+
+
+class ResultWriter:
+    """This class writes machines through one buffered write path.
+
+    The text of the machines is collected in a buffer and written in blocks of
+    about buffer_size characters, instead of one print for every machine. The
+    text written is the same as printing every machine.
+    """
+
+    def __init__(self, output: Optional[TextIO] = None, buffer_size: int = 64 * 1024):
+        self.output = output if output is not None else sys.stdout
+        self.buffer_size = buffer_size
+        self._parts: List[str] = []
+        self._size = 0
+
+    def write(self, text: str):
+        """This method adds text to the buffer, writing it when the buffer is full."""
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def write_machines(self, machines: Iterable[Machine]) -> int:
+        """This method writes every machine in its own line.
+
+        Returns:
+            int: The number of machines written
+        """
+        count = 0
+        for machine in machines:
+            self.write(f"{machine}\n")
+            count += 1
+        return count
+
+    def flush(self):
+        """This method writes the buffered text to the output."""
+        if self._parts:
+            self.output.write("".join(self._parts))
+            self._parts.clear()
+            self._size = 0
+        self.output.flush()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+
+def show_pages(
+    fetch: Callable[[int, int], List[Machine]],
+    page_size: int = 10,
+    output: Optional[TextIO] = None,
+    ask: Callable[[str], str] = input,
+) -> int:
+    """This function shows the results of a search page by page.
+
+    Every page is asked to fetch with the offset and the limit of the page,
+    plus one machine to know if there is a next page, and the user is asked
+    before the next page is fetched.
+
+    Returns:
+        int: The number of machines shown
+    """
+    page = fetch(0, page_size + 1)
+    shown = 0
+    with ResultWriter(output) as writer:
+        if not page:
+            writer.write("\nNo machines found matching the criteria.\n")
+            return 0
+        writer.write("\nSearch Results:\n")
+        number = 1
+        while page:
+            shown += writer.write_machines(page[:page_size])
+            if len(page) <= page_size:
+                break
+            writer.flush()
+            answer = ask(
+                f"\nPage {number} ({shown} machines). "
+                "Press Enter for more results or q to stop: "
+            )
+            if answer.strip().lower() == "q":
+                break
+            page = fetch(shown, page_size + 1)
+            number += 1
+    return shown
@@ -0,0 +1,362 @@
+"""
+This module has an HTTP service with a JSON API over the catalogs of both workshops.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+
+The service runs on asyncio streams and reuses the batch sessions of both
+workshops, so every route takes the same fields as the batch command of the
+same name:
+
+    GET    /machines/search?by=price_range&args=200&args=400
+    POST   /clients                          (client)
+    POST   /machines                         (create_machine)
+    POST   /machines/{id}/videogames         (add_videogame)
+    DELETE /machines/{id}/videogames         (remove_videogame)
+    POST   /arcade-machines                  (first workshop create_machine)
+    POST   /arcade-machines/{id}/videogames  (first workshop add_videogame)
+    GET    /arcade-machines/{id}/videogames?name=Doom or ?genre=Shooter
+    POST   /purchases                        (purchase)
+    GET    /purchases?offset=0&limit=100     (show_purchases)
+
+Every handler runs in a pool of threads, so the event loop keeps serving the
+other connections. The searches run many at the same time, while the
+commands that change the catalogs run one at a time, in the order they
+arrive, once the searches in progress end. The purchases are returned a page
+at a time, of PURCHASES_PAGE records unless a limit is given.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "first_workshop")
+)
+
+# pylint: disable=wrong-import-position
+import cli  # noqa: E402
+import instrumentation  # noqa: E402
+import main  # noqa: E402
+from main_classes import Manager  # noqa: E402
+from users import Catalog  # noqa: E402
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large"}
+MAX_BODY = 1024 * 1024
+# Number of purchase records returned by GET /purchases without a limit.
+PURCHASES_PAGE = 100
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+class HTTPError(Exception):
+    """This exception is a request that can not be served."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadWriteGate:
+    """This class lets many readers in at the same time, or a single writer.
+
+    Writers are served in the order they arrive, and new readers wait while a
+    writer is waiting, so a stream of searches can not delay a write forever.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writers = 0
+        self._writing = asyncio.Lock()
+
+    async def acquire_read(self):
+        """This method waits until no writer is waiting or writing."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._writers == 0)
+            self._readers += 1
+
+    async def release_read(self):
+        """This method lets the writers in when the last reader leaves."""
+        async with self._condition:
+            self._readers -= 1
+            self._condition.notify_all()
+
+    async def acquire_write(self):
+        """This method waits for the writers before it and for the readers inside.
+        A writer cancelled while it waits lets the readers in again."""
+        async with self._condition:
+            self._writers += 1
+        acquired = False
+        try:
+            await self._writing.acquire()
+            acquired = True
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._readers == 0)
+        except BaseException:
+            if acquired:
+                self._writing.release()
+            self._writers -= 1
+            # The readers are woken even if the task is cancelled again.
+            await asyncio.shield(self._notify())
+            raise
+
+    async def _notify(self):
+        """This method wakes the tasks waiting for the gate."""
+        async with self._condition:
+            self._condition.notify_all()
+
+    async def release_write(self):
+        """This method lets in the next writer, or the readers."""
+        self._writing.release()
+        async with self._condition:
+            self._writers -= 1
+            self._condition.notify_all()
+
+
+class CatalogService:
+    """This class serves the catalogs of both workshops through a JSON API."""
+
+    def __init__(self, catalog: Catalog, manager: Manager):
+        self.arcade = main.BatchSession(catalog)
+        self.purchases = cli.BatchSession(manager)
+        self.gate = ReadWriteGate()
+        # Every route is (method, path pattern) -> (handler, is a write).
+        self.routes: Dict[Tuple[str, str], Tuple[Handler, bool]] = {
+            ("GET", "/machines/search"): (self.arcade.search, False),
+            ("POST", "/clients"): (self.arcade.set_client, True),
+            ("POST", "/machines"): (self.arcade.create_machine, True),
+            ("POST", "/machines/{id}/videogames"): (self.arcade.add_videogame, True),
+            ("DELETE", "/machines/{id}/videogames"): (
+                self.arcade.remove_videogame,
+                True,
+            ),
+            ("POST", "/arcade-machines"): (self.purchases.create_machine, True),
+            ("POST", "/arcade-machines/{id}/videogames"): (
+                self.purchases.add_videogame,
+                True,
+            ),
+            ("GET", "/arcade-machines/{id}/videogames"): (
+                self.search_videogames,
+                False,
+            ),
+            ("POST", "/purchases"): (self.purchases.purchase, True),
+            ("GET", "/purchases"): (self.show_purchases, True),
+        }
+
+    def search_videogames(self, command: Dict[str, Any]) -> Any:
+        """This method searches the videogames of an arcade machine by name or genre."""
+        if "name" in command:
+            return self.purchases.search_name(command)
+        return self.purchases.search_genre(command)
+
+    def show_purchases(self, command: Dict[str, Any]) -> Any:
+        """This method returns a page of the records of the purchases journal."""
+        command.setdefault("limit", PURCHASES_PAGE)
+        return self.purchases.show_purchases(command)
+
+    def route(
+        self, method: str, target: str, body: bytes
+    ) -> Tuple[Handler, bool, Dict[str, Any]]:
+        """This method finds the handler of a request and builds its command.
+
+        The command has the fields of the JSON body, the parameters of the
+        query string and the id of the path, as "machine".
+        """
+        url = urlsplit(target)
+        parts = url.path.rstrip("/").split("/")
+        command: Dict[str, Any] = {}
+        machine = None
+        if len(parts) > 2 and parts[2].isdigit():
+            machine = int(parts[2])
+            parts[2] = "{id}"
+        found = self.routes.get((method, "/".join(parts)))
+        if found is None:
+            raise HTTPError(404, f"No route for {method} {url.path}")
+        handler, write = found
+        if body:
+            try:
+                fields = json.loads(body)
+            except ValueError:
+                raise HTTPError(400, "The body is not valid JSON") from None
+            if not isinstance(fields, dict):
+                raise HTTPError(400, "The body must be a JSON object")
+            command.update(fields)
+        for name, values in parse_qs(url.query).items():
+            if name == "args":
+                command[name] = [_query_value(value) for value in values]
+            else:
+                command[name] = values[-1]
+        if machine is not None:
+            command["machine"] = machine
+        return handler, write, command
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, bytes]:
+        """This method runs a request and returns its status and JSON body."""
+        try:
+            handler, write, command = self.route(method, target, body)
+            if write:
+                await self.gate.acquire_write()
+                try:
+                    return await _run_in_executor(handler, command)
+                finally:
+                    await self.gate.release_write()
+            else:
+                await self.gate.acquire_read()
+                try:
+                    return await _run_in_executor(handler, command)
+                finally:
+                    await self.gate.release_read()
+        except HTTPError as e:
+            return e.status, json.dumps({"ok": False, "error": str(e)}).encode()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """This method serves the requests of a connection until it is closed."""
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                status, payload = await self.dispatch(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except HTTPError as e:
+            payload = json.dumps({"ok": False, "error": str(e)}).encode()
+            writer.write(_response(e.status, payload, False))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int):
+        """This method serves requests until the process is stopped."""
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving the catalog on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def _query_value(value: str) -> Any:
+    """This function reads an argument of the query string as JSON, or as text."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _run(handler: Handler, command: Dict[str, Any]) -> Tuple[int, bytes]:
+    """This function runs a handler and encodes its result like a batch command."""
+    status = 400
+    try:
+        response = {"ok": True, "result": handler(command)}
+        status = 200
+    except KeyError as e:
+        response = {"ok": False, "error": f"Missing field: {e}"}
+    except (TypeError, ValueError) as e:
+        response = {"ok": False, "error": str(e)}
+    return status, json.dumps(response).encode()
+
+
+async def _run_in_executor(
+    handler: Handler, command: Dict[str, Any]
+) -> Tuple[int, bytes]:
+    """This function runs a handler in the pool of threads. A cancelled request
+    still waits for its handler to end, so it keeps its place in the gate while
+    the handler runs."""
+    future = asyncio.get_running_loop().run_in_executor(None, _run, handler, command)
+    try:
+        return await asyncio.shield(future)
+    finally:
+        if not future.done():
+            await asyncio.wait([future])
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """This function reads a request, or returns None when the connection ends."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "Invalid request line") from None
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "Invalid Content-Length") from None
+    if length < 0:
+        raise HTTPError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, "The body is too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def _response(status: int, payload: bytes, keep_alive: bool) -> bytes:
+    """This function builds an HTTP response with a JSON body."""
+    lines: List[str] = [
+        f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(payload)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arcade machine catalog service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--journal", default="purchases.txt", help="journal of the purchases"
+    )
+    parser.add_argument(
+        "--metrics",
+        default="",
+        metavar="FILE",
+        help="measure the hot paths and write their latencies to FILE on exit",
+    )
+    arguments = parser.parse_args()
+    if arguments.metrics:
+        instrumentation.measure_until_exit(arguments.metrics)
+    service_catalog = Catalog(cache_size=main.SEARCH_CACHE_SIZE)
+    main.seed_catalog(service_catalog)
+    service_manager = Manager(arguments.journal)
+    service = CatalogService(service_catalog, service_manager)
+    try:
+        asyncio.run(service.serve(arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service_manager.flush()
@@ -0,0 +1,303 @@
+"""
+This module has a catalog split in shards by the type of machine or another key.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import heapq
+from itertools import islice
+from operator import attrgetter
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Union
+from locks import ReadWriteLock
+from machines import Machine
+from users import Catalog
+
+
+def machine_type(machine: Machine) -> str:
+    """This function returns the name of the concrete type of a machine."""
+    return type(machine).__name__
+
+
+class ShardedCatalog:
+    """This class keeps the machines in one Catalog per value of a shard key.
+
+    The key is the concrete type of the machine by default, the name of a field
+    of the machine, or a function of the machine. It must not change while the
+    machine is in the catalog. The searches on the field of the key only go to
+    the shard of the value searched, and the range searches only go to the
+    shards whose smallest and largest value of the field overlap the range. The
+    other searches go to every shard. The results are merged by value for the
+    range searches, as a Catalog does, and in the order the machines were
+    added for the rest, however many shards are searched. With the default key
+    no search is on the field of the key; within() searches the machines of a
+    single type.
+
+    The catalog can be shared between threads like a Catalog: adding a machine
+    holds the lock to write, and the searches hold it to read while they
+    collect the results of the shards.
+
+    The searches within a single shard use the shard itself:
+
+        catalog = ShardedCatalog()
+        catalog.within("RacingMachine").search_by_price_range(200, 400)
+    """
+
+    def __init__(self, shard_key: Union[str, Callable[[Machine], Hashable]] = "type"):
+        if callable(shard_key):
+            self.key_field: Optional[str] = None
+            self._key: Callable[[Machine], Hashable] = shard_key
+        elif shard_key == "type":
+            self.key_field = shard_key
+            self._key = machine_type
+        else:
+            self.key_field = shard_key
+            self._key = attrgetter(shard_key)
+        self.shards: Dict[Hashable, Catalog] = {}
+        self._order: Dict[int, int] = {}
+        self.lock = ReadWriteLock()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    @property
+    def machines(self) -> List[Machine]:
+        """This property is every machine, in the order they were added."""
+        with self.lock.read_lock():
+            return self._by_order([shard.machines for shard in self.shards.values()])
+
+    def add_machine(self, machine: Machine):
+        """Adds a machine to the shard of its key."""
+        key = self._key(machine)
+        with self.lock.write_lock():
+            shard = self.shards.get(key)
+            if shard is None:
+                shard = self.shards[key] = Catalog()
+            self._order[id(machine)] = len(self._order)
+            shard.add_machine(machine)
+
+    def add_machines(self, machines: Iterable[Machine]):
+        """Adds a batch of machines to the catalog."""
+        for machine in machines:
+            self.add_machine(machine)
+
+    def within(self, key: Hashable) -> Catalog:
+        """Returns the shard of a key, such as a type of machine, to search only
+        its machines. An unknown key has an empty catalog."""
+        with self.lock.read_lock():
+            shard = self.shards.get(key)
+        return shard if shard is not None else Catalog()
+
+    def _route(self, field: str, value: Hashable) -> List[Catalog]:
+        """Returns the shards that can have machines with a value of a field."""
+        with self.lock.read_lock():
+            if field != self.key_field:
+                return list(self.shards.values())
+            shard = self.shards.get(value)
+        return [shard] if shard is not None else []
+
+    def _all_shards(self) -> List[Catalog]:
+        """Returns every shard."""
+        with self.lock.read_lock():
+            return list(self.shards.values())
+
+    def _range_shards(
+        self, field: str, min_value: float, max_value: float
+    ) -> List[Catalog]:
+        """Returns the shards whose sorted column of a field can have values in a
+        closed range, checking only the bounds of every column."""
+        shards = []
+        for shard in self._all_shards():
+            with shard.lock.read_lock():
+                if shard.columns[field].overlaps(min_value, max_value):
+                    shards.append(shard)
+        return shards
+
+    def _added(self, machine: Machine) -> int:
+        """Returns the number of machines added before a machine."""
+        return self._order[id(machine)]
+
+    def _by_order(self, results: List[Iterable[Machine]]) -> List[Machine]:
+        """Returns the results of the shards, each in the order of its Catalog,
+        merged in the order the machines were added."""
+        return list(heapq.merge(*results, key=self._added))
+
+    def _search(
+        self,
+        shards: List[Catalog],
+        method: str,
+        args: tuple,
+        offset: int,
+        limit: Optional[int],
+        field: Optional[str] = None,
+    ) -> Iterator[Machine]:
+        """Runs a paged search on some shards and merges their pages. Every shard
+        gives its results sorted by the value of the field of a range search,
+        or else in the order its machines were added, which is the order of
+        the catalog too. So every shard only gives as many machines as the
+        page could take from it, and a single shard gives the page itself."""
+        stop = None if limit is None else offset + limit
+        if len(shards) == 1:
+            return getattr(shards[0], method)(*args, offset=offset, limit=limit)
+        with self.lock.read_lock():
+            merged = heapq.merge(
+                *[
+                    getattr(shard, method)(*args, offset=0, limit=stop)
+                    for shard in shards
+                ],
+                key=self._added if field is None else attrgetter(field),
+            )
+        return islice(merged, offset, stop)
+
+    def iter_by_videogame_count(
+        self, count: int, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines with a specific number of videogames."""
+        return self._search(
+            self._all_shards(),
+            "iter_by_videogame_count",
+            (count,),
+            offset,
+            limit,
+        )
+
+    def iter_by_videogame_count_range(
+        self,
+        min_count: int,
+        max_count: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines with at least min_count videogames and,
+        when max_count is given, at most max_count videogames."""
+        return self._search(
+            self._all_shards(),
+            "iter_by_videogame_count_range",
+            (min_count, max_count),
+            offset,
+            limit,
+        )
+
+    def iter_by_material(
+        self, material: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines with a specific type of material."""
+        return self._search(
+            self._route("material", material),
+            "iter_by_material",
+            (material,),
+            offset,
+            limit,
+        )
+
+    def iter_by_videogame_name(
+        self, videogame_name: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines that have a specific videogame by name."""
+        return self._search(
+            self._all_shards(),
+            "iter_by_videogame_name",
+            (videogame_name,),
+            offset,
+            limit,
+        )
+
+    def iter_by_price_range(
+        self,
+        min_price: float,
+        max_price: float,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines within a specific price range."""
+        return self._search(
+            self._range_shards("base_price", min_price, max_price),
+            "iter_by_price_range",
+            (min_price, max_price),
+            offset,
+            limit,
+            "base_price",
+        )
+
+    def iter_by_weight_range(
+        self,
+        min_weight: int,
+        max_weight: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines within a specific weight range."""
+        return self._search(
+            self._range_shards("weight", min_weight, max_weight),
+            "iter_by_weight_range",
+            (min_weight, max_weight),
+            offset,
+            limit,
+            "weight",
+        )
+
+    def iter_by_power_consumption_range(
+        self,
+        min_power: int,
+        max_power: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines within a specific power consumption range."""
+        return self._search(
+            self._range_shards("power_consumption", min_power, max_power),
+            "iter_by_power_consumption_range",
+            (min_power, max_power),
+            offset,
+            limit,
+            "power_consumption",
+        )
+
+    def search_by_videogame_count(self, count: int) -> List[Machine]:
+        """Searches for machines with a specific number of videogames."""
+        return list(self.iter_by_videogame_count(count))
+
+    def search_by_videogame_count_range(
+        self, min_count: int, max_count: Optional[int] = None
+    ) -> List[Machine]:
+        """Searches for machines with at least min_count videogames and, when
+        max_count is given, at most max_count videogames."""
+        return list(self.iter_by_videogame_count_range(min_count, max_count))
+
+    def search_by_material(self, material: str) -> List[Machine]:
+        """Searches for machines with a specific type of material."""
+        return list(self.iter_by_material(material))
+
+    def search_by_videogame_name(self, videogame_name: str) -> List[Machine]:
+        """Searches for machines that have a specific videogame by name."""
+        return list(self.iter_by_videogame_name(videogame_name))
+
+    def search_by_price_range(
+        self, min_price: float, max_price: float
+    ) -> List[Machine]:
+        """Searches for machines within a specific price range."""
+        return list(self.iter_by_price_range(min_price, max_price))
+
+    def search_by_weight_range(self, min_weight: int, max_weight: int) -> List[Machine]:
+        """Searches for machines within a specific weight range."""
+        return list(self.iter_by_weight_range(min_weight, max_weight))
+
+    def search_by_power_consumption_range(
+        self, min_power: int, max_power: int
+    ) -> List[Machine]:
+        """Searches for machines within a specific power consumption range."""
+        return list(self.iter_by_power_consumption_range(min_power, max_power))
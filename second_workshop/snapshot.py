@@ -0,0 +1,384 @@
+"""
+This module has a compact binary snapshot of a catalog that is opened with mmap.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+
+A snapshot file starts with the magic bytes, the length of a JSON header and
+the header itself. The header lists the sections of the file: fixed-width
+columns of the machines and videogames, a sorted string table, and sorted
+indexes for every search of the catalog. Strings are stored once in the table
+and the columns keep their position in it. Weight, power consumption and base
+price are stored as floats.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Optional
+from machines import Machine, MachineFactory
+from videogames import VideogamesFactory
+
+MAGIC = b"ARCSNAP1"
+ALIGNMENT = 8
+
+MACHINE_STRING_COLUMNS = (
+    "name",
+    "material",
+    "color",
+    "dimensions",
+    "memory",
+    "processor",
+)
+MACHINE_NUMBER_COLUMNS = ("weight", "power_consumption", "base_price")
+VIDEOGAME_STRING_COLUMNS = (
+    "name",
+    "storytelling_creator",
+    "graphics_creator",
+    "category",
+)
+RESOLUTIONS = tuple(sorted(Machine.RESOLUTION_SURCHARGES))
+BASE_ATTRIBUTES = (
+    MACHINE_STRING_COLUMNS + MACHINE_NUMBER_COLUMNS + ("videogames",)
+)
+
+
+def _attributes(machine: Machine) -> str:
+    """This function serializes the attributes of the machine that have no column."""
+    return json.dumps(
+        {
+            key: value
+            for key, value in vars(machine).items()
+            if not key.startswith("_") and key not in BASE_ATTRIBUTES
+        },
+        sort_keys=True,
+    )
+
+
+def _key_index(keys: Iterable[int]) -> Dict[str, array]:
+    """This function sorts the rows by key, keeping the catalog order inside a key."""
+    pairs = sorted((key, row) for row, key in enumerate(keys))
+    return {
+        "keys": array("I", (key for key, _ in pairs)),
+        "rows": array("I", (row for _, row in pairs)),
+    }
+
+
+def write_snapshot(machines: Iterable[Machine], path: str):
+    """This function writes a snapshot of the machines of a catalog.
+
+    Args:
+        machines (Iterable[Machine]): The machines of the catalog, in order
+        path (str): The snapshot file to write
+    """
+    machines = list(machines)
+    strings = set()
+    attributes = [_attributes(machine) for machine in machines]
+    strings.update(attributes)
+    for machine in machines:
+        strings.update(getattr(machine, column) for column in MACHINE_STRING_COLUMNS)
+        for game in machine.videogames:
+            strings.update(getattr(game, column) for column in VIDEOGAME_STRING_COLUMNS)
+    string_table = sorted(strings)
+    string_ids = {string: index for index, string in enumerate(string_table)}
+    machine_types = sorted({type(machine).__name__ for machine in machines})
+    type_ids = {machine_type: index for index, machine_type in enumerate(machine_types)}
+
+    sections: Dict[str, array] = {}
+    sections["machine.type"] = array(
+        "I", (type_ids[type(machine).__name__] for machine in machines)
+    )
+    for column in MACHINE_STRING_COLUMNS:
+        sections[f"machine.{column}"] = array(
+            "I", (string_ids[getattr(machine, column)] for machine in machines)
+        )
+    for column in MACHINE_NUMBER_COLUMNS:
+        sections[f"machine.{column}"] = array(
+            "d", (getattr(machine, column) for machine in machines)
+        )
+    sections["machine.attributes"] = array(
+        "I", (string_ids[attribute] for attribute in attributes)
+    )
+    starts = array("I")
+    counts = array("I")
+    games = []
+    for machine in machines:
+        starts.append(len(games))
+        counts.append(len(machine.videogames))
+        games.extend(machine.videogames)
+    sections["machine.videogames_start"] = starts
+    sections["machine.videogames_count"] = counts
+    for column in VIDEOGAME_STRING_COLUMNS:
+        sections[f"videogame.{column}"] = array(
+            "I", (string_ids[getattr(game, column)] for game in games)
+        )
+    sections["videogame.price"] = array("d", (game.price for game in games))
+    sections["videogame.year"] = array("i", (game.year for game in games))
+    # The resolution a videogame was charged with is stored as its position in
+    # the resolutions of the header, or -1 when it was not charged.
+    charges = [
+        charge for machine in machines for charge in machine.videogame_charges()
+    ]
+    resolution_ids = {resolution: index for index, resolution in enumerate(RESOLUTIONS)}
+    sections["videogame.resolution"] = array(
+        "b", (-1 if charge is None else resolution_ids[charge[0]] for charge in charges)
+    )
+    sections["videogame.charged_cents"] = array(
+        "q", (0 if charge is None else charge[1] for charge in charges)
+    )
+
+    encoded = [string.encode("utf-8") for string in string_table]
+    offsets = array("Q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    sections["strings.offsets"] = offsets
+    sections["strings.data"] = array("B", b"".join(encoded))
+
+    for column in MACHINE_NUMBER_COLUMNS:
+        pairs = sorted(
+            (getattr(machine, column), row) for row, machine in enumerate(machines)
+        )
+        sections[f"index.{column}.values"] = array("d", (value for value, _ in pairs))
+        sections[f"index.{column}.rows"] = array("I", (row for _, row in pairs))
+    for name, keys in (
+        ("material", sections["machine.material"]),
+        ("videogame_count", counts),
+    ):
+        for part, values in _key_index(keys).items():
+            sections[f"index.{name}.{part}"] = values
+    game_pairs = sorted(
+        {
+            (string_ids[game.name], row)
+            for row, machine in enumerate(machines)
+            for game in machine.videogames
+        }
+    )
+    sections["index.videogame_name.keys"] = array("I", (key for key, _ in game_pairs))
+    sections["index.videogame_name.rows"] = array("I", (row for _, row in game_pairs))
+
+    header: Dict[str, Any] = {
+        "byteorder": sys.byteorder,
+        "machines": len(machines),
+        "machine_types": machine_types,
+        "resolutions": RESOLUTIONS,
+        "sections": {},
+    }
+    # The offsets depend on the length of the header, so it is measured with
+    # placeholders of a fixed width and filled afterwards.
+    for name, values in sections.items():
+        header["sections"][name] = [0, len(values), values.typecode]
+    header_length = len(json.dumps(header)) + 32 * len(sections)
+    offset = _align(len(MAGIC) + 8 + header_length)
+    for name, values in sections.items():
+        header["sections"][name][0] = offset
+        offset = _align(offset + len(values) * values.itemsize)
+    header_bytes = json.dumps(header).encode("utf-8").ljust(header_length)
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", header_length))
+        file.write(header_bytes)
+        for name, values in sections.items():
+            file.seek(header["sections"][name][0])
+            file.write(values.tobytes())
+        file.truncate(offset)
+
+
+def _align(offset: int) -> int:
+    """This function rounds an offset up to the alignment of the sections."""
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+class CatalogSnapshot:
+    """This class is a read-only catalog opened from a snapshot file.
+
+    Opening the snapshot only maps the file and reads the header, so it takes
+    the same time for any number of machines. The searches use the sorted
+    indexes of the file and only build the machines that they return. The
+    machines built are copies: changing them does not change the snapshot.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")  # pylint: disable=consider-using-with
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Invalid catalog snapshot: {path}")
+        (header_length,) = struct.unpack_from("<Q", self._map, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._map[start : start + header_length])
+        if header["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError("The snapshot was written with another byte order")
+        self._machine_count = header["machines"]
+        self._machine_types = header["machine_types"]
+        self._resolutions = header.get("resolutions", [])
+        self._buffer = memoryview(self._map)
+        self._views: List[memoryview] = [self._buffer]
+        self._sections: Dict[str, memoryview] = {}
+        for name, (offset, count, typecode) in header["sections"].items():
+            size = array(typecode).itemsize
+            view = self._buffer[offset : offset + count * size].cast(typecode)
+            self._views.append(view)
+            self._sections[name] = view
+
+    def close(self):
+        """This method releases the mapped file."""
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "CatalogSnapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._machine_count
+
+    def _string(self, string_id: int) -> str:
+        """This method reads a string of the string table."""
+        offsets = self._sections["strings.offsets"]
+        return str(
+            self._sections["strings.data"][offsets[string_id] : offsets[string_id + 1]],
+            "utf-8",
+        )
+
+    def _string_id(self, string: str) -> Optional[int]:
+        """This method finds the position of a string in the sorted string table."""
+        count = len(self._sections["strings.offsets"]) - 1
+        index = bisect_left(range(count), string, key=self._string)
+        if index < count and self._string(index) == string:
+            return index
+        return None
+
+    def machine(self, row: int) -> Machine:
+        """This method builds the machine stored in a row of the snapshot."""
+        sections = self._sections
+        values = {
+            column: self._string(sections[f"machine.{column}"][row])
+            for column in MACHINE_STRING_COLUMNS
+        }
+        machine = MachineFactory.create_machine(
+            self._machine_types[sections["machine.type"][row]],
+            values["name"],
+            values["material"],
+            values["color"],
+        )
+        for column, value in values.items():
+            setattr(machine, column, value)
+        for column in MACHINE_NUMBER_COLUMNS:
+            setattr(machine, column, sections[f"machine.{column}"][row])
+        attributes = json.loads(self._string(sections["machine.attributes"][row]))
+        for key, value in attributes.items():
+            setattr(machine, key, value)
+        start = sections["machine.videogames_start"][row]
+        count = sections["machine.videogames_count"][row]
+        machine.videogames = [
+            VideogamesFactory.create_videogames(
+                machine.videogame_type,
+                *(
+                    self._string(sections[f"videogame.{column}"][index])
+                    for column in VIDEOGAME_STRING_COLUMNS
+                ),
+                sections["videogame.price"][index],
+                sections["videogame.year"][index],
+            )
+            for index in range(start, start + count)
+        ]
+        if "videogame.resolution" in sections:
+            resolutions = sections["videogame.resolution"]
+            cents = sections["videogame.charged_cents"]
+            machine.restore_charges(
+                None
+                if resolutions[index] < 0
+                else (self._resolutions[resolutions[index]], cents[index])
+                for index in range(start, start + count)
+            )
+        return machine
+
+    @property
+    def machines(self) -> List[Machine]:
+        """This property builds every machine of the snapshot, in order."""
+        return [self.machine(row) for row in range(self._machine_count)]
+
+    def _key_rows(self, name: str, min_key: int, max_key: Optional[int]) -> List[int]:
+        """This method returns the rows of a key index in a closed range of keys."""
+        keys = self._sections[f"index.{name}.keys"]
+        start = bisect_left(keys, min_key)
+        end = len(keys) if max_key is None else bisect_right(keys, max_key)
+        return self._sections[f"index.{name}.rows"][start:end].tolist()
+
+    def _build(self, rows: Iterable[int]) -> List[Machine]:
+        """This method builds the machines of the rows of a result."""
+        return [self.machine(row) for row in rows]
+
+    def search_by_videogame_count(self, count: int) -> List[Machine]:
+        """Searches for machines with a specific number of videogames."""
+        return self._build(self._key_rows("videogame_count", count, count))
+
+    def search_by_videogame_count_range(
+        self, min_count: int, max_count: Optional[int] = None
+    ) -> List[Machine]:
+        """Searches for machines with at least min_count videogames and, when
+        max_count is given, at most max_count videogames."""
+        return self._build(self._key_rows("videogame_count", min_count, max_count))
+
+    def search_by_material(self, material: str) -> List[Machine]:
+        """Searches for machines with a specific type of material."""
+        string_id = self._string_id(material)
+        if string_id is None:
+            return []
+        return self._build(self._key_rows("material", string_id, string_id))
+
+    def search_by_videogame_name(self, videogame_name: str) -> List[Machine]:
+        """Searches for machines that have a specific videogame by name."""
+        string_id = self._string_id(videogame_name)
+        if string_id is None:
+            return []
+        return self._build(self._key_rows("videogame_name", string_id, string_id))
+
+    def _search_range(
+        self, field: str, min_value: float, max_value: float
+    ) -> List[Machine]:
+        """Searches the sorted index of a field for a closed range of values."""
+        values = self._sections[f"index.{field}.values"]
+        start = bisect_left(values, min_value)
+        end = bisect_right(values, max_value)
+        return self._build(self._sections[f"index.{field}.rows"][start:end].tolist())
+
+    def search_by_price_range(
+        self, min_price: float, max_price: float
+    ) -> List[Machine]:
+        """Searches for machines within a specific price range."""
+        return self._search_range("base_price", min_price, max_price)
+
+    def search_by_weight_range(self, min_weight: int, max_weight: int) -> List[Machine]:
+        """Searches for machines within a specific weight range."""
+        return self._search_range("weight", min_weight, max_weight)
+
+    def search_by_power_consumption_range(
+        self, min_power: int, max_power: int
+    ) -> List[Machine]:
+        """Searches for machines within a specific power consumption range."""
+        return self._search_range("power_consumption", min_power, max_power)
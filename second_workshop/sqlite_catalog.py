@@ -0,0 +1,466 @@
+"""
+This module has a catalog of machines persisted in a SQLite database.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import sqlite3
+import weakref
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from machines import Machine, MachineFactory, MachineObserver
+from videogames import Videogames, VideogamesFactory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS machines (
+    id INTEGER PRIMARY KEY,
+    machine_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    material TEXT NOT NULL,
+    color TEXT NOT NULL,
+    dimensions TEXT NOT NULL,
+    weight REAL NOT NULL,
+    power_consumption REAL NOT NULL,
+    memory TEXT NOT NULL,
+    processor TEXT NOT NULL,
+    base_price REAL NOT NULL,
+    videogame_count INTEGER NOT NULL,
+    attributes TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS videogames (
+    id INTEGER PRIMARY KEY,
+    machine_id INTEGER NOT NULL REFERENCES machines (id),
+    name TEXT NOT NULL,
+    storytelling_creator TEXT NOT NULL,
+    graphics_creator TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    year INTEGER NOT NULL,
+    resolution TEXT,
+    charged_cents INTEGER
+);
+CREATE INDEX IF NOT EXISTS machines_material ON machines (material);
+CREATE INDEX IF NOT EXISTS machines_base_price ON machines (base_price);
+CREATE INDEX IF NOT EXISTS machines_weight ON machines (weight);
+CREATE INDEX IF NOT EXISTS machines_power_consumption ON machines (power_consumption);
+CREATE INDEX IF NOT EXISTS machines_videogame_count ON machines (videogame_count);
+CREATE INDEX IF NOT EXISTS videogames_name ON videogames (name, machine_id);
+CREATE INDEX IF NOT EXISTS videogames_machine_id ON videogames (machine_id);
+"""
+
+MACHINE_COLUMNS = (
+    "name",
+    "material",
+    "color",
+    "dimensions",
+    "weight",
+    "power_consumption",
+    "memory",
+    "processor",
+    "base_price",
+)
+VIDEOGAME_COLUMNS = (
+    "name",
+    "storytelling_creator",
+    "graphics_creator",
+    "category",
+    "price",
+    "year",
+)
+
+# The resolution and the cents a videogame was charged with, NULL when it was
+# not charged.
+CHARGE_COLUMNS = ("resolution", "charged_cents")
+
+# Number of rows fetched and built together by the searches.
+FETCH_SIZE = 500
+
+_INSERT_VIDEOGAME = (
+    "INSERT INTO videogames (machine_id, "
+    + ", ".join(VIDEOGAME_COLUMNS + CHARGE_COLUMNS)
+    + ") VALUES ("
+    + ", ".join("?" * (len(VIDEOGAME_COLUMNS) + len(CHARGE_COLUMNS) + 1))
+    + ")"
+)
+
+
+def _videogame_row(
+    machine_id: int, videogame: Videogames, charge: Optional[Tuple[str, int]]
+) -> Tuple[Any, ...]:
+    """This function returns the values of the row of a videogame of a machine."""
+    return (
+        machine_id,
+        *(getattr(videogame, column) for column in VIDEOGAME_COLUMNS),
+        *(charge if charge is not None else (None, None)),
+    )
+
+
+class SQLiteCatalog(MachineObserver):
+    """This class represents the catalog of machines stored in a SQLite database.
+
+    It has the same methods as users.Catalog, so both can be used one instead of
+    the other. Every search runs as an indexed SQL query and only the machines
+    of the result are built. The returned machines stay attached to the
+    catalog, so define_values and the Client videogame changes are saved.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self._add_charge_columns()
+        self._ids: "weakref.WeakKeyDictionary[Machine, int]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _add_charge_columns(self):
+        """Adds the columns of the charges to a database created without them."""
+        columns = {
+            row[1] for row in self.connection.execute("PRAGMA table_info(videogames)")
+        }
+        with self.connection:
+            for column, kind in zip(CHARGE_COLUMNS, ("TEXT", "INTEGER")):
+                if column not in columns:
+                    self.connection.execute(
+                        f"ALTER TABLE videogames ADD COLUMN {column} {kind}"
+                    )
+
+    def close(self):
+        """Closes the connection to the database."""
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM machines").fetchone()[0]
+
+    @property
+    def machines(self) -> List[Machine]:
+        """Loads every machine of the catalog, in the order they were added."""
+        return self._query("SELECT * FROM machines ORDER BY id")
+
+    @staticmethod
+    def _attributes(machine: Machine) -> str:
+        """Serializes the attributes of the machine that have no column."""
+        return json.dumps(
+            {
+                key: value
+                for key, value in vars(machine).items()
+                if not key.startswith("_")
+                and key not in MACHINE_COLUMNS
+                and key != "videogames"
+            }
+        )
+
+    def _insert(self, machine: Machine):
+        """Inserts a machine and its videogames without committing."""
+        cursor = self.connection.execute(
+            "INSERT INTO machines (machine_type, "
+            + ", ".join(MACHINE_COLUMNS)
+            + ", videogame_count, attributes) VALUES ("
+            + ", ".join("?" * (len(MACHINE_COLUMNS) + 3))
+            + ")",
+            (
+                type(machine).__name__,
+                *(getattr(machine, column) for column in MACHINE_COLUMNS),
+                len(machine.videogames),
+                self._attributes(machine),
+            ),
+        )
+        machine_id = cursor.lastrowid
+        self.connection.executemany(
+            _INSERT_VIDEOGAME,
+            [
+                _videogame_row(machine_id, game, charge)
+                for game, charge in zip(
+                    machine.videogames, machine.videogame_charges()
+                )
+            ],
+        )
+        self._ids[machine] = machine_id
+        machine.attach(self)
+
+    def add_machine(self, machine: Machine):
+        """Adds a machine to the catalog."""
+        with self.connection:
+            self._insert(machine)
+
+    def add_machines(self, machines: Iterable[Machine]):
+        """Adds a batch of machines to the catalog in one transaction."""
+        with self.connection:
+            for machine in machines:
+                self._insert(machine)
+
+    def machine_field_changed(
+        self, machine: Machine, field: str, old_value: Any, new_value: Any
+    ):
+        """Saves the new value of a field of a machine."""
+        if field in MACHINE_COLUMNS:
+            with self.connection:
+                self.connection.execute(
+                    f"UPDATE machines SET {field} = ? WHERE id = ?",
+                    (new_value, self._ids[machine]),
+                )
+
+    def videogame_added(self, machine: Machine, videogame: Videogames):
+        """Saves a videogame added to a machine."""
+        machine_id = self._ids[machine]
+        with self.connection:
+            self.connection.execute(
+                _INSERT_VIDEOGAME,
+                _videogame_row(machine_id, videogame, machine.charge_of(videogame)),
+            )
+            self._update_videogames_summary(machine, machine_id)
+
+    def videogame_removed(self, machine: Machine, videogame: Videogames):
+        """Deletes a videogame removed from a machine."""
+        machine_id = self._ids[machine]
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM videogames WHERE id = (SELECT id FROM videogames "
+                "WHERE machine_id = ? AND "
+                + " AND ".join(f"{column} = ?" for column in VIDEOGAME_COLUMNS)
+                + " LIMIT 1)",
+                (
+                    machine_id,
+                    *(getattr(videogame, column) for column in VIDEOGAME_COLUMNS),
+                ),
+            )
+            self._update_videogames_summary(machine, machine_id)
+
+    def _update_videogames_summary(self, machine: Machine, machine_id: int):
+        """Saves the number of videogames and the price totals of a machine."""
+        self.connection.execute(
+            "UPDATE machines SET videogame_count = ?, attributes = ? WHERE id = ?",
+            (len(machine.videogames), self._attributes(machine), machine_id),
+        )
+
+    def _load(
+        self,
+        row: Sequence[Any],
+        videogames: List[Videogames],
+        charges: List[Optional[Tuple[str, int]]],
+    ) -> Machine:
+        """Builds a machine from its row, its videogames and their charges."""
+        machine_id, machine_type, *values, _, attributes = row
+        machine = MachineFactory.create_machine(
+            machine_type, values[0], values[1], values[2]
+        )
+        for column, value in zip(MACHINE_COLUMNS, values):
+            setattr(machine, column, value)
+        for key, value in json.loads(attributes).items():
+            setattr(machine, key, value)
+        machine.videogames = videogames
+        machine.restore_charges(charges)
+        self._ids[machine] = machine_id
+        machine.attach(self)
+        return machine
+
+    def _build(self, rows: List[Sequence[Any]]) -> List[Machine]:
+        """Builds the machines of some rows of the machines table."""
+        videogames: Dict[int, List[Videogames]] = {row[0]: [] for row in rows}
+        charges: Dict[int, List[Optional[Tuple[str, int]]]] = {
+            row[0]: [] for row in rows
+        }
+        types = {
+            row[0]: MachineFactory.machine_class(row[1]).videogame_type for row in rows
+        }
+        ids = list(videogames)
+        # SQLite limits the number of parameters of a query, so the videogames
+        # are loaded in chunks of machines.
+        for start in range(0, len(ids), FETCH_SIZE):
+            chunk = ids[start : start + FETCH_SIZE]
+            for machine_id, *values, resolution, cents in self.connection.execute(
+                "SELECT machine_id, "
+                + ", ".join(VIDEOGAME_COLUMNS + CHARGE_COLUMNS)
+                + " FROM videogames WHERE machine_id IN ("
+                + ", ".join("?" * len(chunk))
+                + ") ORDER BY id",
+                chunk,
+            ):
+                videogames[machine_id].append(
+                    VideogamesFactory.create_videogames(types[machine_id], *values)
+                )
+                charges[machine_id].append(
+                    None if resolution is None else (resolution, cents)
+                )
+        return [
+            self._load(row, videogames[row[0]], charges[row[0]]) for row in rows
+        ]
+
+    def _iter_query(
+        self,
+        sql: str,
+        parameters: Sequence[Any] = (),
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Runs a query over the machines table and yields a page of the machines
+        found, building them FETCH_SIZE rows at a time."""
+        cursor = self.connection.execute(
+            sql + " LIMIT ? OFFSET ?",
+            (*parameters, -1 if limit is None else limit, offset),
+        )
+        rows = cursor.fetchmany(FETCH_SIZE)
+        while rows:
+            yield from self._build(rows)
+            rows = cursor.fetchmany(FETCH_SIZE)
+
+    def _query(self, sql: str, parameters: Sequence[Any] = ()) -> List[Machine]:
+        """Runs a query over the machines table and builds the machines found."""
+        return list(self._iter_query(sql, parameters))
+
+    def iter_by_videogame_count(
+        self, count: int, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines with a specific number of videogames."""
+        return self._iter_query(
+            "SELECT * FROM machines WHERE videogame_count = ? ORDER BY id",
+            (count,),
+            offset,
+            limit,
+        )
+
+    def iter_by_videogame_count_range(
+        self,
+        min_count: int,
+        max_count: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines with at least min_count videogames and,
+        when max_count is given, at most max_count videogames."""
+        if max_count is None:
+            return self._iter_query(
+                "SELECT * FROM machines WHERE videogame_count >= ? "
+                "ORDER BY videogame_count, id",
+                (min_count,),
+                offset,
+                limit,
+            )
+        return self._iter_query(
+            "SELECT * FROM machines WHERE videogame_count BETWEEN ? AND ? "
+            "ORDER BY videogame_count, id",
+            (min_count, max_count),
+            offset,
+            limit,
+        )
+
+    def iter_by_material(
+        self, material: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines with a specific type of material."""
+        return self._iter_query(
+            "SELECT * FROM machines WHERE material = ? ORDER BY id",
+            (material,),
+            offset,
+            limit,
+        )
+
+    def iter_by_videogame_name(
+        self, videogame_name: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines that have a specific videogame by name."""
+        return self._iter_query(
+            "SELECT * FROM machines WHERE id IN "
+            "(SELECT machine_id FROM videogames WHERE name = ?) ORDER BY id",
+            (videogame_name,),
+            offset,
+            limit,
+        )
+
+    def _iter_range(
+        self,
+        field: str,
+        min_value: float,
+        max_value: float,
+        offset: int,
+        limit: Optional[int],
+    ) -> Iterator[Machine]:
+        """Yields a page of the index of a field for a closed range of values."""
+        return self._iter_query(
+            f"SELECT * FROM machines WHERE {field} BETWEEN ? AND ? "
+            f"ORDER BY {field}, id",
+            (min_value, max_value),
+            offset,
+            limit,
+        )
+
+    def iter_by_price_range(
+        self,
+        min_price: float,
+        max_price: float,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines within a specific price range."""
+        return self._iter_range("base_price", min_price, max_price, offset, limit)
+
+    def iter_by_weight_range(
+        self,
+        min_weight: int,
+        max_weight: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines within a specific weight range."""
+        return self._iter_range("weight", min_weight, max_weight, offset, limit)
+
+    def iter_by_power_consumption_range(
+        self,
+        min_power: int,
+        max_power: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Yields a page of the machines within a specific power consumption range."""
+        return self._iter_range(
+            "power_consumption", min_power, max_power, offset, limit
+        )
+
+    def search_by_videogame_count(self, count: int) -> List[Machine]:
+        """Searches for machines with a specific number of videogames."""
+        return list(self.iter_by_videogame_count(count))
+
+    def search_by_videogame_count_range(
+        self, min_count: int, max_count: Optional[int] = None
+    ) -> List[Machine]:
+        """Searches for machines with at least min_count videogames and, when
+        max_count is given, at most max_count videogames."""
+        return list(self.iter_by_videogame_count_range(min_count, max_count))
+
+    def search_by_material(self, material: str) -> List[Machine]:
+        """Searches for machines with a specific type of material."""
+        return list(self.iter_by_material(material))
+
+    def search_by_videogame_name(self, videogame_name: str) -> List[Machine]:
+        """Searches for machines that have a specific videogame by name."""
+        return list(self.iter_by_videogame_name(videogame_name))
+
+    def search_by_price_range(
+        self, min_price: float, max_price: float
+    ) -> List[Machine]:
+        """Searches for machines within a specific price range."""
+        return list(self.iter_by_price_range(min_price, max_price))
+
+    def search_by_weight_range(self, min_weight: int, max_weight: int) -> List[Machine]:
+        """Searches for machines within a specific weight range."""
+        return list(self.iter_by_weight_range(min_weight, max_weight))
+
+    def search_by_power_consumption_range(
+        self, min_power: int, max_power: int
+    ) -> List[Machine]:
+        """Searches for machines within a specific power consumption range."""
+        return list(self.iter_by_power_consumption_range(min_power, max_power))
@@ -0,0 +1,64 @@
+"""
+This module has the tests of the batch sessions of main.py.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import io
+import json
+from main import BatchSession, load_snapshot
+from users import Catalog
+
+CREATE_MACHINE = {
+    "command": "create_machine",
+    "machine_type": "RacingMachine",
+    "name": "Racer",
+    "material": "wood",
+    "color": "red",
+}
+
+
+def run(*lines: str):
+    """This function runs the lines in a new session and returns the results."""
+    output = io.StringIO()
+    BatchSession(Catalog()).run(lines, output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def test_a_command_that_is_not_an_object_fails_alone():
+    results = run('"hello"', "[1]", "3", json.dumps(CREATE_MACHINE))
+    assert [result["ok"] for result in results] == [False, False, False, True]
+
+
+def test_a_negative_machine_id_is_unknown():
+    remove = {"command": "remove_videogame", "machine": -1, "name": "Doom"}
+    results = run(json.dumps(CREATE_MACHINE), json.dumps(remove))
+    assert results[1] == {"line": 2, "ok": False, "error": "Unknown machine: -1"}
+
+
+def test_a_written_snapshot_starts_a_new_catalog(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    write = {"command": "write_snapshot", "path": path}
+    results = run(json.dumps(CREATE_MACHINE), json.dumps(write))
+    assert results[1]["result"] == {"path": path, "machines": 1}
+    catalog = Catalog()
+    load_snapshot(catalog, path)
+    assert [machine.to_dict() for machine in catalog.machines] == [
+        results[0]["result"]["machine"]
+    ]
@@ -0,0 +1,45 @@
+"""
+This module has the tests of the catalog of machines.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+from machines import MachineFactory
+from users import Catalog
+from videogames import VideogamesFactory
+
+
+def test_searches_keep_the_order_of_the_catalog():
+    catalog = Catalog()
+    machines = MachineFactory.create_many(
+        ("RacingMachine", f"M{index}", "wood", "red") for index in range(10)
+    )
+    catalog.add_machines(machines)
+    # The indexes get the machines in the order the videogames are added, from
+    # the last machine to the first.
+    for machine in machines[::-1]:
+        machine.add_videogame(
+            VideogamesFactory.create_videogames(
+                machine.videogame_type, "Extra", "Studio", "Visuals", "Arcade", 10, 2000
+            )
+        )
+    assert catalog.search_by_videogame_name("Extra") == machines
+    assert catalog.search_by_videogame_count(3) == machines
+    assert list(catalog.iter_by_videogame_count(3, 2, 3)) == machines[2:5]
+    assert list(catalog.iter_by_videogame_name("Extra", 8)) == machines[8:]
@@ -0,0 +1,86 @@
+"""
+This module has the tests of the importer of fleet files.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import io
+import json
+import pytest
+from importer import FleetImportError, import_fleet, import_fleet_file
+from sqlite_catalog import SQLiteCatalog
+from users import Catalog
+
+
+def fleet(*names: str) -> io.StringIO:
+    """This function builds a JSON Lines fleet with a racing machine per name.
+    A name starting with "!" has an invalid machine type."""
+    rows = [
+        {
+            "machine_type": "Pinball" if name.startswith("!") else "RacingMachine",
+            "name": name.lstrip("!"),
+            "material": "wood",
+            "color": "red",
+        }
+        for name in names
+    ]
+    return io.StringIO("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def names(catalog) -> list:
+    """This function returns the names of the machines of a catalog."""
+    return [machine.name for machine in catalog.machines]
+
+
+def test_an_invalid_row_stops_the_import_after_the_rows_before_it():
+    catalog = Catalog()
+    with pytest.raises(FleetImportError) as error:
+        import_fleet(catalog, fleet("A", "B", "C", "!D", "E"), "jsonl", batch_size=2)
+    assert error.value.line == 4
+    assert error.value.imported == 3
+    assert names(catalog) == ["A", "B", "C"]
+
+
+def test_invalid_rows_can_be_skipped():
+    catalog = Catalog()
+    file = fleet("A", "!B", "C", "D")
+    file.seek(0, io.SEEK_END)
+    file.write('[1]\n{"name": "F"}\n')
+    file.seek(0)
+    report = import_fleet(catalog, file, "jsonl", batch_size=3, skip_invalid=True)
+    assert names(catalog) == ["A", "C", "D"]
+    assert report.rows == 3
+    assert [line for line, _ in report.skipped] == [2, 5, 6]
+    assert report.skipped[2][1] == "Missing field: 'machine_type'"
+
+
+def test_a_csv_row_is_reported_by_its_line(tmp_path):
+    path = tmp_path / "fleet.csv"
+    path.write_text(
+        "machine_type,name,material,color,videogames\n"
+        "RacingMachine,A,wood,red,\n"
+        "RacingMachine,B,wood,red,[oops\n",
+        encoding="utf-8",
+    )
+    catalog = SQLiteCatalog(str(tmp_path / "catalog.db"))
+    with pytest.raises(FleetImportError) as error:
+        import_fleet_file(catalog, str(path))
+    assert error.value.line == 3
+    assert names(catalog) == ["A"]
+    catalog.close()
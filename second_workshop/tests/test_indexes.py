@@ -0,0 +1,59 @@
+"""
+This module has the tests of the indexes of the catalog.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+from indexes import BucketIndex, InvertedIndex, TitleIndex
+
+
+def index_of(*titles: str) -> TitleIndex:
+    """This function builds an index of the titles."""
+    index = TitleIndex()
+    index.update(titles)
+    return index
+
+
+def test_suggest_prefers_one_typo():
+    index = index_of("Tetris", "Tetrix", "Metrics")
+    assert index.suggest("Tetriz") == ["Tetris", "Tetrix"]
+
+
+def test_suggest_allows_a_second_typo_only_when_there_is_no_closer_title():
+    index = index_of("Tetris", "Pac-Man")
+    assert index.suggest("Tetrxz") == ["Tetris"]
+    assert index.suggest("Tetrxz", max_distance=0) == []
+
+
+def test_suggest_adds_the_titles_that_start_with_the_name():
+    index = index_of("Street Fighter", "Street Fighter II")
+    assert index.suggest("street fighter") == ["Street Fighter", "Street Fighter II"]
+
+
+def test_lookups_in_order_sort_only_the_keys_added_out_of_order():
+    names, counts = InvertedIndex(), BucketIndex()
+    for position in (0, 5, 2):
+        names.add("Doom", position)
+        counts.add(3, position)
+    names.add("Tetris", 1)
+    names.add("Tetris", 4)
+    assert list(names.lookup_in_order("Doom")) == [0, 2, 5]
+    assert list(counts.lookup_in_order(3)) == [0, 2, 5]
+    assert list(names.lookup_in_order("Tetris")) == [1, 4]
+    assert list(names.lookup_in_order("Pac-Man")) == []
@@ -0,0 +1,66 @@
+"""
+This module has the tests of the instrumentation.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import sys
+import threading
+import instrumentation
+from instrumentation import OperationStats
+
+
+def test_concurrent_records_are_not_lost():
+    stats = OperationStats()
+    interval = sys.getswitchinterval()
+    # Switching threads as often as possible makes lost updates likely.
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [
+            threading.Thread(
+                target=lambda: [stats.record(0.001) for _ in range(20_000)]
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    count, total, buckets = stats.snapshot()
+    assert count == 80_000
+    assert sum(buckets) == 80_000
+    assert abs(total - 80.0) < 1e-6
+
+
+def test_enable_reports_the_hot_paths_it_skips(monkeypatch):
+    hot_paths = {
+        ("users", "Client"): ("add_videogame_to_catalog",),
+        ("no_such_module", "Manager"): ("add_purchase",),
+    }
+    monkeypatch.setattr(instrumentation, "HOT_PATHS", hot_paths)
+    try:
+        skipped = instrumentation.enable()
+        assert instrumentation.is_enabled()
+    finally:
+        instrumentation.disable()
+    assert skipped == [
+        "no_such_module.Manager (No module named 'no_such_module')"
+    ]
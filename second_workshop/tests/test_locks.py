@@ -0,0 +1,55 @@
+"""
+This module has the tests of the readers-writer lock.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import pytest
+from locks import ReadWriteLock
+
+
+def test_read_runs_again_under_the_lock_when_a_write_comes_in():
+    lock = ReadWriteLock()
+    calls = []
+
+    def function():
+        calls.append(lock._readers)  # pylint: disable=protected-access
+        if len(calls) == 1:
+            with lock.write_lock():
+                pass
+        return len(calls)
+
+    assert lock.read(function) == 2
+    assert calls == [0, 1]
+
+
+def test_read_fails_when_no_write_comes_in():
+    lock = ReadWriteLock()
+
+    def function():
+        raise KeyError("missing")
+
+    with pytest.raises(KeyError):
+        lock.read(function)
+
+
+def test_read_inside_a_write_takes_the_lock_again():
+    lock = ReadWriteLock()
+    with lock.write_lock():
+        assert lock.read(lambda: 42) == 42
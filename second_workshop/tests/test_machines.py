@@ -0,0 +1,115 @@
+"""
+This module has the tests of the price of the machines.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import random
+import pytest
+from machines import MachineFactory
+from videogames import VideogamesFactory
+
+MACHINE_TYPES = (
+    "DanceRevolution",
+    "ClassicalArcade",
+    "ShootingMachine",
+    "RacingMachine",
+    "VirtualReality",
+)
+RESOLUTIONS = (None, "HD", "SD", "SH")
+
+
+def new_videogame(machine, name: str, price: float):
+    """This function creates a videogame of the type of a machine."""
+    return VideogamesFactory.create_videogames(
+        machine.videogame_type, name, "Studio", "Visuals", "Arcade", price, 2000
+    )
+
+
+@pytest.mark.parametrize("machine_type", MACHINE_TYPES)
+def test_removing_a_bundled_videogame_does_not_discount_it(machine_type):
+    machine = MachineFactory.create_machine(machine_type, "Test", "wood", "red")
+    machine.remove_videogame(machine.videogames[0], "HD")
+    assert machine.price == machine.base_price
+
+
+def test_removal_discounts_the_resolution_it_was_charged_with():
+    machine = MachineFactory.create_machine("ShootingMachine", "Test", "wood", "red")
+    videogame = new_videogame(machine, "Extra", 100.0)
+    machine.add_videogame(videogame, "SH")
+    machine.remove_videogame(videogame, "HD")
+    assert machine.videogames_price_by_resolution == {"HD": 0, "SD": 0, "SH": 0}
+    assert machine.price == machine.base_price
+
+
+def test_removing_an_uncharged_videogame_does_not_discount_it():
+    machine = MachineFactory.create_machine("RacingMachine", "Test", "wood", "red")
+    videogame = new_videogame(machine, "Extra", 100.0)
+    machine.add_videogame(videogame)
+    machine.remove_videogame(videogame, "HD")
+    assert machine.price == machine.base_price
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_removals_never_take_the_price_below_the_base_price(seed):
+    rng = random.Random(seed)
+    machine = MachineFactory.create_machine(
+        rng.choice(MACHINE_TYPES), "Test", "wood", "red"
+    )
+    for step in range(200):
+        if machine.videogames and rng.random() < 0.5:
+            machine.remove_videogame(
+                rng.choice(machine.videogames), rng.choice(RESOLUTIONS)
+            )
+        else:
+            machine.add_videogame(
+                new_videogame(machine, f"Game {step}", rng.uniform(1, 100)),
+                rng.choice(RESOLUTIONS),
+            )
+        assert machine.price >= machine.base_price
+    while machine.videogames:
+        machine.remove_videogame(machine.videogames[-1], "HD")
+    assert machine.price == pytest.approx(machine.base_price)
+
+
+def test_invalid_resolution_is_rejected():
+    machine = MachineFactory.create_machine("VirtualReality", "Test", "wood", "red")
+    with pytest.raises(ValueError):
+        machine.add_videogame(new_videogame(machine, "Extra", 10.0), "4K")
+
+
+def test_videogames_is_a_list_of_the_shared_bundle():
+    first = MachineFactory.create_machine("DanceRevolution", "A", "wood", "red")
+    second = MachineFactory.create_machine("DanceRevolution", "B", "wood", "red")
+    assert all(a is b for a, b in zip(first.videogames, second.videogames))
+    first.videogames.append(new_videogame(first, "Extra", 10.0))
+    assert len(first.videogames) == len(second.videogames) + 1
+
+
+def test_the_text_follows_the_changes_of_the_machine():
+    machine = MachineFactory.create_machine("ClassicalArcade", "Test", "wood", "red")
+    text = str(machine)
+    machine.enable_vibration()
+    assert "Make Vibration: True" in str(machine)
+    machine.define_values(100.0, 10, 10, "aluminium")
+    assert f"Base Price: ${machine.base_price}\n" in str(machine)
+    machine.add_videogame(new_videogame(machine, "Extra", 10.0))
+    assert "Extra" in str(machine)
+    machine.remove_videogame(machine.videogames[-1])
+    machine.disable_vibration()
+    assert "Make Vibration: False" in str(machine) and str(machine) != text
@@ -0,0 +1,55 @@
+"""
+This module has the tests of the parallel scan of the machines.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import threading
+from machines import MachineFactory
+from parallel import parallel_scan
+
+
+def is_red(machine) -> bool:
+    """This function is a picklable condition."""
+    return machine.color == "red"
+
+
+def test_concurrent_scans_do_not_share_their_machines():
+    fleets = [
+        MachineFactory.create_many(
+            ("RacingMachine", f"{fleet}{index}", "wood", color)
+            for index in range(300)
+        )
+        for fleet, color in (("A", "red"), ("B", "red"), ("C", "blue"))
+    ]
+    results = {}
+
+    def scan(fleet):
+        results[id(fleet)] = [
+            parallel_scan(fleet, is_red, workers=2, threshold=0) for _ in range(3)
+        ]
+
+    threads = [threading.Thread(target=scan, args=(fleet,)) for fleet in fleets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for fleet in fleets:
+        expected = [machine for machine in fleet if is_red(machine)]
+        assert results[id(fleet)] == [expected] * 3
@@ -0,0 +1,57 @@
+"""
+This module has the tests of the pages of the results of the searches.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import io
+from main import menu_search, seed_catalog
+from results import show_pages
+from users import Catalog
+
+
+def paged_search(catalog: Catalog, calls: list):
+    """This function returns a search of every machine that records its pages."""
+    fetch = menu_search(catalog, "price_range", 0, float("inf"))
+
+    def recorded(offset: int, limit: int):
+        calls.append((offset, limit))
+        return fetch(offset, limit)
+
+    return recorded
+
+
+def test_every_page_is_fetched_with_its_offset_and_limit():
+    catalog = Catalog(cache_size=128)
+    seed_catalog(catalog)
+    calls: list = []
+    output = io.StringIO()
+    shown = show_pages(paged_search(catalog, calls), 2, output, lambda _: "")
+    assert shown == len(catalog)
+    assert calls == [(0, 3), (2, 3), (4, 3)]
+    assert output.getvalue().count("Machine Details:") == len(catalog)
+
+
+def test_stopping_does_not_fetch_the_next_page():
+    catalog = Catalog()
+    seed_catalog(catalog)
+    calls: list = []
+    shown = show_pages(paged_search(catalog, calls), 2, io.StringIO(), lambda _: "q")
+    assert shown == 2
+    assert calls == [(0, 3)]
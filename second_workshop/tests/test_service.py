@@ -0,0 +1,95 @@
+"""
+This module has the tests of the catalog service.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import asyncio
+import json
+import threading
+import pytest
+from service import CatalogService, HTTPError, Manager, ReadWriteGate, _read_request
+from users import Catalog
+
+
+def read_request(data: bytes):
+    """This function reads a request from the bytes of a connection."""
+
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await _read_request(reader)
+
+    return asyncio.run(read())
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-1"])
+def test_an_invalid_content_length_is_a_bad_request(length):
+    with pytest.raises(HTTPError) as error:
+        read_request(b"POST /x HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert error.value.status == 400
+
+
+def test_a_cancelled_writer_lets_the_readers_in():
+    async def scenario():
+        gate = ReadWriteGate()
+        await gate.acquire_read()
+        writer = asyncio.create_task(gate.acquire_write())
+        await asyncio.sleep(0)
+        writer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await writer
+        await asyncio.wait_for(gate.acquire_read(), timeout=1)
+        await gate.release_read()
+        await gate.release_read()
+        await asyncio.wait_for(gate.acquire_write(), timeout=1)
+
+    asyncio.run(scenario())
+
+
+def request(service: CatalogService, method: str, target: str, body: dict = None):
+    """This function runs a request in the service and returns its JSON body."""
+    data = json.dumps(body).encode() if body is not None else b""
+    _, payload = asyncio.run(service.dispatch(method, target, data))
+    return json.loads(payload)
+
+
+def test_the_writes_run_out_of_the_event_loop(tmp_path):
+    service = CatalogService(Catalog(), Manager(str(tmp_path / "purchases.txt")))
+    threads = []
+    service.routes[("POST", "/clients")] = (
+        lambda command: threads.append(threading.current_thread()),
+        True,
+    )
+    request(service, "POST", "/clients", {})
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_the_purchases_are_returned_by_pages(tmp_path):
+    service = CatalogService(Catalog(), Manager(str(tmp_path / "purchases.txt")))
+    machine = {"material": "wood", "color": "red"}
+    request(service, "POST", "/arcade-machines", machine)
+    buyer = {"address": "Street 1", "phone": "555", "email": "ana@mail.com"}
+    for number in range(5):
+        purchase = {"machine": 0, "name": f"U{number}", **buyer}
+        request(service, "POST", "/purchases", purchase)
+    page = request(service, "GET", "/purchases?offset=1&limit=3")["result"]
+    assert [record.split("Name: ")[1][:2] for record in page] == ["U1", "U2", "U3"]
+    assert len(request(service, "GET", "/purchases")["result"]) == 5
@@ -0,0 +1,85 @@
+"""
+This module has the tests of the sharded catalog.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import random
+from machines import MachineFactory
+from sharding import ShardedCatalog
+from videogames import VideogamesFactory
+
+MACHINE_TYPES = ("DanceRevolution", "ClassicalArcade", "RacingMachine")
+
+
+def test_merged_results_keep_the_order_the_machines_were_added():
+    rng = random.Random(0)
+    catalog = ShardedCatalog()
+    machines = MachineFactory.create_many(
+        (rng.choice(MACHINE_TYPES), f"M{index}", "wood", "red") for index in range(60)
+    )
+    catalog.add_machines(machines)
+    # The shards index the videogame in the order it is added, from the last
+    # machine to the first.
+    for machine in machines[::-2]:
+        machine.add_videogame(
+            VideogamesFactory.create_videogames(
+                machine.videogame_type, "Extra", "Studio", "Visuals", "Arcade", 10, 2000
+            )
+        )
+    expected = machines[::-2][::-1]
+    assert catalog.search_by_videogame_name("Extra") == expected
+    assert list(catalog.iter_by_videogame_name("Extra", 5, 10)) == expected[5:15]
+
+
+def test_a_single_shard_keeps_the_order_the_machines_were_added():
+    catalog = ShardedCatalog("material")
+    machines = MachineFactory.create_many(
+        ("RacingMachine", f"M{index}", "wood", "red") for index in range(10)
+    )
+    catalog.add_machines(machines)
+    for machine in machines[::-1]:
+        machine.add_videogame(
+            VideogamesFactory.create_videogames(
+                machine.videogame_type, "Extra", "Studio", "Visuals", "Arcade", 10, 2000
+            )
+        )
+    assert catalog.search_by_material("wood") == machines
+    assert catalog.search_by_videogame_name("Extra") == machines
+
+
+def test_range_searches_skip_the_shards_out_of_the_range():
+    catalog = ShardedCatalog()
+    catalog.add_machines(
+        MachineFactory.create_many(
+            (machine_type, f"M{index}", "wood", "red")
+            for index, machine_type in enumerate(MACHINE_TYPES * 5)
+        )
+    )
+    searched = []
+    for key, shard in catalog.shards.items():
+        search = shard.iter_by_price_range
+        shard.iter_by_price_range = (
+            lambda *args, key=key, search=search, **kwargs: searched.append(key)
+            or search(*args, **kwargs)
+        )
+    price = catalog.within("ClassicalArcade").machines[0].base_price
+    found = catalog.search_by_price_range(price, price)
+    assert searched == ["ClassicalArcade"]
+    assert {type(machine).__name__ for machine in found} == {"ClassicalArcade"}
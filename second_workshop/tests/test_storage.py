@@ -0,0 +1,149 @@
+"""
+This module has the tests of the stored catalogs.
+
+Author: Alejandro Nuñez <anunezb@udistrital.edu.co>
+
+This file is part of Arcagames-2.
+
+Arcagames-2 is free software: you can redistribute it and/or
+modify it under the terms of the GNU General Public License as
+published by the Free Software Foundation, either version 3 of
+the License, or (at your option) any later version.
+
+Arcagames-2 is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import random
+from machines import MachineFactory
+from snapshot import CatalogSnapshot, write_snapshot
+from sqlite_catalog import SQLiteCatalog
+from users import Catalog, Client
+from videogames import VideogamesFactory
+
+
+def charged_machine():
+    """This function creates a shooting machine with a videogame charged in HD."""
+    machine = MachineFactory.create_machine("ShootingMachine", "S", "wood", "red")
+    videogame = VideogamesFactory.create_videogames(
+        machine.videogame_type, "Extra", "Studio", "Visuals", "Arcade", 20.0, 2000
+    )
+    machine.add_videogame(videogame, "HD")
+    return machine
+
+
+def remove_extra(machine):
+    """This function removes the charged videogame as a client does."""
+    client = Client(1, "Ana", "ana@mail.com", "555", "Street 1")
+    extra = next(game for game in machine.videogames if game.name == "Extra")
+    client.remove_videogame_from_catalog(machine, extra, "HD")
+
+
+def test_sqlite_keeps_the_charges(tmp_path):
+    path = str(tmp_path / "catalog.db")
+    machine = charged_machine()
+    catalog = SQLiteCatalog(path)
+    catalog.add_machine(machine)
+    catalog.close()
+
+    catalog = SQLiteCatalog(path)
+    (loaded,) = catalog.machines
+    assert loaded.price == machine.price
+    remove_extra(loaded)
+    assert loaded.price == loaded.base_price
+    catalog.close()
+
+    catalog = SQLiteCatalog(path)
+    (reloaded,) = catalog.machines
+    assert reloaded.price == reloaded.base_price
+    catalog.close()
+
+
+def test_snapshot_keeps_the_charges(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    machine = charged_machine()
+    write_snapshot([machine], path)
+    with CatalogSnapshot(path) as snapshot:
+        loaded = snapshot.machine(0)
+    assert loaded.price == machine.price
+    remove_extra(loaded)
+    assert loaded.price == loaded.base_price
+
+
+MACHINE_TYPES = (
+    "DanceRevolution",
+    "ClassicalArcade",
+    "ShootingMachine",
+    "RacingMachine",
+    "VirtualReality",
+)
+MATERIALS = ("wood", "aluminium", "carbon_fiber")
+
+
+def random_machines(count: int):
+    """This function creates machines with random materials and videogames."""
+    rng = random.Random(count)
+    machines = []
+    for index in range(count):
+        machine = MachineFactory.create_machine(
+            rng.choice(MACHINE_TYPES), f"M{index}", rng.choice(MATERIALS), "red"
+        )
+        machine.define_values(
+            machine.base_price,
+            machine.weight,
+            machine.power_consumption,
+            machine.material,
+        )
+        for _ in range(rng.randrange(4)):
+            machine.add_videogame(
+                VideogamesFactory.create_videogames(
+                    machine.videogame_type,
+                    f"Game {rng.randrange(10)}",
+                    "Studio",
+                    "Visuals",
+                    "Arcade",
+                    rng.uniform(1, 100),
+                    2000,
+                ),
+                rng.choice((None, "HD", "SD", "SH")),
+            )
+        machines.append(machine)
+    return machines
+
+
+def found(machines):
+    """This function returns the machines of a result by name. The snapshot
+    stores the numbers as floats, so they are compared as numbers."""
+    return sorted(
+        (machine.to_dict() for machine in machines), key=lambda data: data["name"]
+    )
+
+
+def test_snapshot_searches_match_the_catalog(tmp_path):
+    path = str(tmp_path / "catalog.snap")
+    machines = random_machines(200)
+    catalog = Catalog()
+    catalog.add_machines(machines)
+    write_snapshot(machines, path)
+    searches = [
+        ("search_by_videogame_count", (count,)) for count in range(1, 7)
+    ] + [
+        ("search_by_videogame_count_range", (3, None)),
+        ("search_by_videogame_count_range", (2, 4)),
+        ("search_by_videogame_name", ("Game 3",)),
+        ("search_by_videogame_name", ("Doom",)),
+        ("search_by_price_range", (250, 350)),
+        ("search_by_weight_range", (200, 400)),
+        ("search_by_power_consumption_range", (100, 300)),
+    ] + [("search_by_material", (material,)) for material in MATERIALS + ("x",)]
+    with CatalogSnapshot(path) as snapshot:
+        assert len(snapshot) == len(catalog)
+        for search, args in searches:
+            expected = found(getattr(catalog, search)(*args))
+            assert found(getattr(snapshot, search)(*args)) == expected, search
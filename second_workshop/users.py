@@ -19,67 +19,347 @@ You should have received a copy of the GNU General Public License
 along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>. 
 """
 
-from typing import List
-from machines import Machine
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+from cache import SearchCache, cached_search
+from indexes import BucketIndex, InvertedIndex, SortedColumn, TitleIndex
+from locks import ReadWriteLock
+from machines import Machine, MachineObserver
+from parallel import PARALLEL_THRESHOLD, Condition, MatchesAll, parallel_scan
+from query import CatalogQuery
 from videogames import Videogames
 
 
 # =====================================Catalog==========================================
-class Catalog:
-    """This class represents the catalog of machines registered in the system."""
+class Catalog(MachineObserver):
+    """This class represents the catalog of machines registered in the system.
 
-    def __init__(self):
+    The catalog can be shared between threads. Adding a machine and every
+    change of a machine of the catalog, with the update of the indexes, hold
+    the lock to write. The searches copy their page of results with the read
+    of the lock, which only waits when a change comes in, so a search never
+    sees a machine changed but not indexed yet. Since the page is copied at
+    once, only its limit bounds the memory of an iter_by_* search.
+
+    The machines of a range search come in the order of the values searched,
+    and the machines of the other searches in the order of the catalog, which
+    is the order they were added.
+
+    With a cache_size, the results of the search_by_* methods are kept in an
+    LRU cache, and every change removes only the results it can alter. Those
+    searches then hold the read lock, so they do not take the lock-free path.
+    """
+
+    RANGE_FIELDS = ("base_price", "weight", "power_consumption")
+
+    def __init__(self, cache_size: int = 0):
         self.machines: List[Machine] = []
+        self.columns: Dict[str, SortedColumn] = {
+            field: SortedColumn() for field in self.RANGE_FIELDS
+        }
+        self.materials = InvertedIndex()
+        self.videogame_names = InvertedIndex()
+        self.videogame_titles = TitleIndex()
+        self.videogame_counts = BucketIndex()
+        self._positions: Dict[int, int] = {}
+        self.lock = ReadWriteLock()
+        self.cache: Optional[SearchCache] = (
+            SearchCache(cache_size) if cache_size else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.machines)
 
     def add_machine(self, machine: Machine):
         """Adds a machine to the catalog."""
-        self.machines.append(machine)
+        with self.lock.write_lock():
+            position = len(self.machines)
+            self.machines.append(machine)
+            self._positions[id(machine)] = position
+            for field, column in self.columns.items():
+                column.insert(getattr(machine, field), position)
+            self.materials.add(machine.material, position)
+            for videogame in machine.videogames:
+                self.videogame_names.add(videogame.name, position)
+                self.videogame_titles.add(videogame.name)
+            self.videogame_counts.add(len(machine.videogames), position)
+            machine.attach(self)
+            if self.cache is not None:
+                for field in self.RANGE_FIELDS:
+                    self.cache.invalidate(field, [getattr(machine, field)])
+                self.cache.invalidate("material", [machine.material])
+                self.cache.invalidate(
+                    "videogame_name", [game.name for game in machine.videogames]
+                )
+                self.cache.invalidate("videogame_count", [len(machine.videogames)])
+
+    def add_machines(self, machines: Iterable[Machine]):
+        """Adds a batch of machines to the catalog."""
+        for machine in machines:
+            self.add_machine(machine)
+
+    def changing(self, machine: Machine) -> ContextManager:
+        """Holds the lock to write while a machine of the catalog changes."""
+        return self.lock.write_lock()
+
+    def machine_field_changed(
+        self, machine: Machine, field: str, old_value: Any, new_value: Any
+    ):
+        """Keeps the indexes of the fields up to date when a machine changes."""
+        position = self._positions[id(machine)]
+        column = self.columns.get(field)
+        if column is not None:
+            column.remove(old_value, position)
+            column.insert(new_value, position)
+        elif field == "material":
+            self.materials.remove(old_value, position)
+            self.materials.add(new_value, position)
+        if self.cache is not None:
+            self.cache.invalidate(field, [old_value, new_value])
+
+    def videogame_added(self, machine: Machine, videogame: Videogames):
+        """Indexes the name of a videogame added to a machine."""
+        position = self._positions[id(machine)]
+        self.videogame_names.add(videogame.name, position)
+        self.videogame_titles.add(videogame.name)
+        count = len(machine.videogames)
+        self.videogame_counts.move(count - 1, count, position)
+        if self.cache is not None:
+            self.cache.invalidate("videogame_name", [videogame.name])
+            self.cache.invalidate("videogame_count", [count - 1, count])
+
+    def videogame_removed(self, machine: Machine, videogame: Videogames):
+        """Removes the name of a videogame removed from a machine from the index."""
+        position = self._positions[id(machine)]
+        self.videogame_names.remove(videogame.name, position)
+        self.videogame_titles.remove(videogame.name)
+        count = len(machine.videogames)
+        self.videogame_counts.move(count + 1, count, position)
+        if self.cache is not None:
+            self.cache.invalidate("videogame_name", [videogame.name])
+            self.cache.invalidate("videogame_count", [count + 1, count])
+
+    def _page(
+        self,
+        lookup: Callable[..., Iterable[int]],
+        args: Tuple[Any, ...],
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Machine]:
+        """Returns the machines at the positions an index lookup gives for a page
+        of a search. The page is copied at once, so a change never tears it, and
+        only the limit bounds its size."""
+        return self.lock.read(self._read_page, lookup, args, offset, limit)
+
+    def _read_page(
+        self,
+        lookup: Callable[..., Iterable[int]],
+        args: Tuple[Any, ...],
+        offset: int,
+        limit: Optional[int],
+    ) -> List[Machine]:
+        """Copies a page of a search, without the lock."""
+        positions = lookup(*args)
+        if offset or limit is not None:
+            stop = None if limit is None else offset + limit
+            positions = islice(positions, offset, stop)
+        return list(map(self.machines.__getitem__, positions))
+
+    def iter_by_videogame_count(
+        self, count: int, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines with a specific number
+        of videogames."""
+        return iter(
+            self._page(
+                self.videogame_counts.lookup_in_order, (count,), offset, limit
+            )
+        )
+
+    def iter_by_videogame_count_range(
+        self,
+        min_count: int,
+        max_count: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines with at least
+        min_count videogames and, when max_count is given, at most max_count
+        videogames."""
+        return iter(
+            self._page(
+                self.videogame_counts.iter_range, (min_count, max_count), offset, limit
+            )
+        )
+
+    def iter_by_material(
+        self, material: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines with a specific type
+        of material."""
+        return iter(
+            self._page(self.materials.lookup_in_order, (material,), offset, limit)
+        )
+
+    def iter_by_videogame_name(
+        self, videogame_name: str, offset: int = 0, limit: Optional[int] = None
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines that have a specific
+        videogame by name."""
+        return iter(
+            self._page(
+                self.videogame_names.lookup_in_order, (videogame_name,), offset, limit
+            )
+        )
 
+    def _range(
+        self,
+        field: str,
+        min_value: float,
+        max_value: float,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> List[Machine]:
+        """Returns a page of the sorted column of a field for a closed range of
+        values."""
+        return self._page(
+            self.columns[field].slice_range, (min_value, max_value, offset, limit)
+        )
+
+    def iter_by_price_range(
+        self,
+        min_price: float,
+        max_price: float,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines within a specific
+        price range."""
+        return iter(self._range("base_price", min_price, max_price, offset, limit))
+
+    def iter_by_weight_range(
+        self,
+        min_weight: int,
+        max_weight: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines within a specific
+        weight range."""
+        return iter(self._range("weight", min_weight, max_weight, offset, limit))
+
+    def iter_by_power_consumption_range(
+        self,
+        min_power: int,
+        max_power: int,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Iterator[Machine]:
+        """Returns an iterator over a page of the machines within a specific
+        power consumption range."""
+        return iter(
+            self._range("power_consumption", min_power, max_power, offset, limit)
+        )
+
+    def complete_videogame_name(self, prefix: str, limit: int = 10) -> List[str]:
+        """Returns the names of the videogames of the catalog that start with the
+        prefix, ignoring case, in alphabetical order."""
+        with self.lock.read_lock():
+            return self.videogame_titles.complete(prefix, limit)
+
+    def suggest_videogame_names(
+        self, videogame_name: str, max_distance: int = 1, limit: int = 10
+    ) -> List[str]:
+        """Returns the names of the videogames of the catalog that are at most
+        max_distance typos away from the name, or one more when there are none,
+        the closest first, followed by the names that start with it."""
+        with self.lock.read_lock():
+            return self.videogame_titles.suggest(videogame_name, max_distance, limit)
+
+    def query(self, **predicates: Any) -> CatalogQuery:
+        """Builds a query that combines several searches, such as
+        catalog.query(material="wood", price_range=(200, 400))."""
+        return CatalogQuery(self, **predicates)
+
+    def parallel_search(
+        self,
+        condition: Optional[Condition] = None,
+        workers: Optional[int] = None,
+        threshold: int = PARALLEL_THRESHOLD,
+        **predicates: Any,
+    ) -> List[Machine]:
+        """Searches for machines by scanning them in a process pool, for the
+        conditions no index covers. The predicates are those of query(), and
+        the condition is any picklable function of a machine, such as
+        catalog.parallel_search(is_retro, material="wood")."""
+        query = CatalogQuery(self, **predicates)
+        conditions: List[Condition] = [
+            predicate.matches for predicate in query.predicates
+        ]
+        if condition is not None:
+            conditions.append(condition)
+        with self.lock.read_lock():
+            return parallel_scan(
+                self.machines, MatchesAll(conditions), workers, threshold
+            )
+
+    @cached_search("videogame_count", lambda count: lambda value: value == count)
     def search_by_videogame_count(self, count: int) -> List[Machine]:
         """Searches for machines with a specific number of videogames."""
-        return [
-            machine for machine in self.machines if len(machine.videogames) == count
-        ]
+        return self._page(self.videogame_counts.lookup_in_order, (count,))
+
+    @cached_search(
+        "videogame_count",
+        lambda min_count, max_count=None: lambda value: value >= min_count
+        and (max_count is None or value <= max_count),
+    )
+    def search_by_videogame_count_range(
+        self, min_count: int, max_count: Optional[int] = None
+    ) -> List[Machine]:
+        """Searches for machines with at least min_count videogames and, when
+        max_count is given, at most max_count videogames."""
+        return self._page(self.videogame_counts.iter_range, (min_count, max_count))
 
+    @cached_search("material", lambda material: lambda value: value == material)
     def search_by_material(self, material: str) -> List[Machine]:
         """Searches for machines with a specific type of material."""
-        return [machine for machine in self.machines if machine.material == material]
+        return self._page(self.materials.lookup_in_order, (material,))
 
+    @cached_search("videogame_name", lambda name: lambda value: value == name)
     def search_by_videogame_name(self, videogame_name: str) -> List[Machine]:
         """Searches for machines that have a specific videogame by name."""
-        return [
-            machine
-            for machine in self.machines
-            if any(videogame.name == videogame_name for videogame in machine.videogames)
-        ]
+        return self._page(self.videogame_names.lookup_in_order, (videogame_name,))
 
+    @cached_search("base_price", lambda low, high: lambda value: low <= value <= high)
     def search_by_price_range(
         self, min_price: float, max_price: float
     ) -> List[Machine]:
         """Searches for machines within a specific price range."""
-        return [
-            machine
-            for machine in self.machines
-            if min_price <= machine.base_price <= max_price
-        ]
+        return self._range("base_price", min_price, max_price)
 
+    @cached_search("weight", lambda low, high: lambda value: low <= value <= high)
     def search_by_weight_range(self, min_weight: int, max_weight: int) -> List[Machine]:
         """Searches for machines within a specific weight range."""
-        return [
-            machine
-            for machine in self.machines
-            if min_weight <= machine.weight <= max_weight
-        ]
+        return self._range("weight", min_weight, max_weight)
 
+    @cached_search(
+        "power_consumption", lambda low, high: lambda value: low <= value <= high
+    )
     def search_by_power_consumption_range(
         self, min_power: int, max_power: int
     ) -> List[Machine]:
         """Searches for machines within a specific power consumption range."""
-        return [
-            machine
-            for machine in self.machines
-            if min_power <= machine.power_consumption <= max_power
-        ]
+        return self._range("power_consumption", min_power, max_power)
 
 
 # ==========================================Client============================================
@@ -105,11 +385,7 @@ class Client:
             videogame (Videogame): The videogame to add
             videogame_resolution (str): The resolution of the videogame
         """
-        machine.videogames.append(videogame)
-        if videogame_resolution == "HD":
-            machine.price = machine.base_price + videogame.price * (1 + 0.1)
-        elif videogame_resolution == "SD":
-            machine.price = machine.base_price + videogame.price
+        machine.add_videogame(videogame, videogame_resolution)
 
     def remove_videogame_from_catalog(
         self, machine: Machine, videogame: Videogames, videogame_resolution: str
@@ -121,11 +397,7 @@ class Client:
             videogame (Videogame): The videogame to remove
             videogame_resolution (str): The resolution of the videogame
         """
-        machine.videogames.remove(videogame)
-        if videogame_resolution == "HD":
-            machine.price = machine.base_price - videogame.price * (1 + 0.1)
-        elif videogame_resolution == "SD":
-            machine.price = machine.base_price - videogame.price
+        machine.remove_videogame(videogame, videogame_resolution)
 
 
 class Admin:
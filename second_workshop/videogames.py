@@ -20,6 +20,7 @@ along with Arcagames-2. If not, see <https://www.gnu.org/licenses/>.
 """
 
 from abc import ABC
+from typing import Any, Dict, Iterable, List, Tuple, Type
 
 
 class Videogames(ABC):
@@ -41,6 +42,17 @@ class Videogames(ABC):
         self.price = price
         self.year = year
 
+    def to_dict(self) -> Dict[str, Any]:
+        """This method returns the videogame as a dictionary of plain values."""
+        return {
+            "name": self.name,
+            "storytelling_creator": self.storytelling_creator,
+            "graphics_creator": self.graphics_creator,
+            "category": self.category,
+            "price": self.price,
+            "year": self.year,
+        }
+
     def __str__(self):
         return (
             f"Name: {self.name}, "
@@ -62,6 +74,27 @@ class VirtualReality(Videogames):
 class VideogamesFactory:
     """This class defines the factory of videogames of each type of arcade videogames machine."""
 
+    _registry: Dict[str, Type[Videogames]] = {
+        "dance": DancingVideogames,
+        "classical": ClassicalVideogames,
+        "racing": RacingVideogames,
+        "shooting": ShootingVideogames,
+        "virtualreality": VirtualReality,
+    }
+
+    @staticmethod
+    def register(machine_type: str, videogames_class: Type[Videogames]):
+        """This method registers the class of videogames of a type of machine."""
+        VideogamesFactory._registry[machine_type] = videogames_class
+
+    @staticmethod
+    def videogames_class(machine_type: str) -> Type[Videogames]:
+        """This method returns the class of videogames registered for a type of machine."""
+        try:
+            return VideogamesFactory._registry[machine_type]
+        except KeyError:
+            raise ValueError(f"Invalid videogame type: {machine_type}") from None
+
     @staticmethod
     def create_videogames(
         machine_type: str,
@@ -73,24 +106,27 @@ class VideogamesFactory:
         year: int,
     ):
         """This method creates the videogames of each type of arcade videogames machine."""
+        return VideogamesFactory.videogames_class(machine_type)(
+            name, storytelling_creator, graphics_creator, category, price, year
+        )
+
+    @staticmethod
+    def create_many(
+        specs: Iterable[Tuple[str, str, str, str, str, float, int]]
+    ) -> List[Videogames]:
+        """This method creates many videogames at once.
 
-        if machine_type == "dance":
-            return DancingVideogames(
-                name, storytelling_creator, graphics_creator, category, price, year
-            )
-        elif machine_type == "classical":
-            return ClassicalVideogames(
-                name, storytelling_creator, graphics_creator, category, price, year
-            )
-        elif machine_type == "racing":
-            return RacingVideogames(
-                name, storytelling_creator, graphics_creator, category, price, year
-            )
-        elif machine_type == "shooting":
-            return ShootingVideogames(
-                name, storytelling_creator, graphics_creator, category, price, year
-            )
-        elif machine_type == "virtualreality":
-            return VirtualReality(
-                name, storytelling_creator, graphics_creator, category, price, year
-            )
+        Each spec has the arguments of create_videogames. Every spec is
+        validated before any videogame is created, so an invalid spec does not
+        leave a partial result.
+        """
+        specs = list(specs)
+        classes = []
+        for index, spec in enumerate(specs):
+            if len(spec) != 7:
+                raise ValueError(f"Invalid videogame spec at {index}: {spec!r}")
+            classes.append(VideogamesFactory.videogames_class(spec[0]))
+        return [
+            videogames_class(*spec[1:])
+            for videogames_class, spec in zip(classes, specs)
+        ]